@@ -1,16 +1,34 @@
+import json
+import os
+import sys
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from sklearn.linear_model import LinearRegression
+import plotly.io as pio
 from statsmodels.tsa.arima.model import ARIMA
 from io import BytesIO
-from prophet import Prophet
 import altair as alt
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+# Helper modules live next to the pipeline scripts in code/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "code"))
+from report_builder import build_report
+from aggregate_cube import load_or_build_cube
+from correlation import load_or_compute_correlation
+from figure_cache import FigureCache
+from fingerprint import frame_fingerprint
+import instrumentation
+from instrumentation import span
+from schema import model_precision
+from downsampling import downsample_frame, line_trace, render_mode
+from prophet_forecast import HORIZON_YEARS, load_or_forecast, prophet_frame
+from scenario_model import ScenarioModel
+from scenario_store import load_or_build_store
+from storage import read_dataset
+
 # Set page configuration
 st.set_page_config(
     page_title="🌌 Advanced Global Warming Analysis",
@@ -69,21 +87,49 @@ menu_choice = st.sidebar.radio("Navigate", menu_options)
 # Load the dataset
 @st.cache_data
 def load_data(file_path="fully_cleaned_global_warming_sim_dataset.csv"):
-    return pd.read_csv(file_path)
+    return read_dataset(file_path)
+
+@st.cache_data
+def load_fingerprint(file_path="fully_cleaned_global_warming_sim_dataset.csv"):
+    return frame_fingerprint(load_data(file_path))
+
+@st.cache_resource
+def get_aggregate_cube(fingerprint):
+    return load_or_build_cube(load_data())
+
+# Shared across sessions: figure specs and aggregates keyed by dataset fingerprint
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache()
 
 df = load_data()
+data_fingerprint = load_fingerprint()
+figure_cache = get_figure_cache()
+
+# Precomputed predictions for every slider position, loaded once per dataset version
+@st.cache_resource
+def get_scenario_store(fingerprint):
+    try:
+        return load_or_build_store(load_data())
+    except ValueError:
+        # Too large to precompute; scenarios are then predicted on demand
+        return None
+
+@st.cache_resource
+def get_scenario_model(fingerprint):
+    with span("scenario_fit", "model"):
+        return ScenarioModel.fit(load_data())
 
 # Function to generate custom scenario predictions
 def generate_scenario(df, co2_change, ch4_change, n2o_change):
-    scenario_df = df.copy()
-    scenario_df["CO2_Concentration_ppm"] += co2_change
-    scenario_df["CH4_Concentration_ppb"] += ch4_change
-    scenario_df["N2O_Concentration_ppb"] += n2o_change
-    X = scenario_df[["CO2_Concentration_ppm", "CH4_Concentration_ppb", "N2O_Concentration_ppb"]]
-    y = scenario_df["Temperature_Anomaly_C"]
-    model = LinearRegression()
-    model.fit(X, y)
-    scenario_df["Predicted_Temperature_Anomaly_C"] = model.predict(X)
+    scenario_df = df[["Year", "Temperature_Anomaly_C"]].copy()
+    store = get_scenario_store(data_fingerprint)
+    with span("scenario_lookup", "model", rows=len(df)):
+        if store is not None:
+            predictions, _ = store.lookup(co2_change, ch4_change, n2o_change)
+        else:
+            predictions = get_scenario_model(data_fingerprint).predict_series((co2_change, ch4_change, n2o_change))[0]
+    scenario_df["Predicted_Temperature_Anomaly_C"] = predictions
     return scenario_df
 
 # Home Page
@@ -106,17 +152,24 @@ elif menu_choice == "📊 Scenario Analysis":
     ch4_change = st.slider("CH4 Change (ppb)", -50.0, 50.0, 0.0, step=5.0)
     n2o_change = st.slider("N2O Change (ppb)", -5.0, 5.0, 0.0, step=0.5)
 
-    scenario_df = generate_scenario(df, co2_change, ch4_change, n2o_change)
+    def build_scenario_chart():
+        scenario_df = generate_scenario(df, co2_change, ch4_change, n2o_change)
+        y_columns = ["Temperature_Anomaly_C", "Predicted_Temperature_Anomaly_C"]
+        return px.line(
+            downsample_frame(scenario_df, "Year", y_columns),
+            x="Year",
+            y=y_columns,
+            labels={"value": "Temperature Anomaly (°C)", "variable": "Scenario"},
+            title="Scenario Analysis of Temperature Anomalies",
+            render_mode=render_mode(len(scenario_df))
+        ).to_json()
 
     st.write("### Scenario Results")
-    fig = px.line(
-        scenario_df,
-        x="Year",
-        y=["Temperature_Anomaly_C", "Predicted_Temperature_Anomaly_C"],
-        labels={"value": "Temperature Anomaly (°C)", "variable": "Scenario"},
-        title="Scenario Analysis of Temperature Anomalies"
+    fig_json = figure_cache.get_or_build(
+        "scenario_chart", data_fingerprint, build_scenario_chart,
+        params={"co2": co2_change, "ch4": ch4_change, "n2o": n2o_change}
     )
-    st.plotly_chart(fig)
+    st.plotly_chart(pio.from_json(fig_json))
 
 # Advanced Visualizations
 elif menu_choice == "📈 Advanced Visualizations":
@@ -124,19 +177,40 @@ elif menu_choice == "📈 Advanced Visualizations":
 
     # Altair Scatter Plot
     st.write("### Altair Interactive Scatter Plot")
-    alt_chart = alt.Chart(df).mark_circle(size=60).encode(
-        x='CO2_Concentration_ppm',
-        y='Temperature_Anomaly_C',
-        color='Year:N',
-        tooltip=['Year', 'CO2_Concentration_ppm', 'Temperature_Anomaly_C']
-    ).interactive()
-    st.altair_chart(alt_chart, use_container_width=True)
+    alt_spec = figure_cache.get_or_build(
+        "altair_scatter", data_fingerprint,
+        lambda: alt.Chart(df).mark_circle(size=60).encode(
+            x='CO2_Concentration_ppm',
+            y='Temperature_Anomaly_C',
+            color='Year:N',
+            tooltip=['Year', 'CO2_Concentration_ppm', 'Temperature_Anomaly_C']
+        ).interactive().to_json()
+    )
+    st.vega_lite_chart(json.loads(alt_spec), use_container_width=True)
 
     # Heatmap
     st.write("### Correlation Heatmap")
-    plt.figure(figsize=(12, 8))
-    sns.heatmap(df.corr(), annot=True, fmt=".2f", cmap="coolwarm")
-    st.pyplot(plt)
+    correlation_matrix = figure_cache.get_or_build_aggregate(
+        "correlation_matrix", data_fingerprint, lambda: load_or_compute_correlation(df).matrix
+    )
+
+    def build_correlation_heatmap():
+        with span("correlation_heatmap", "render"):
+            fig, ax = plt.subplots(figsize=(12, 8))
+            sns.heatmap(correlation_matrix, annot=True, fmt=".2f", cmap="coolwarm", ax=ax)
+            buffer_png = BytesIO()
+            fig.savefig(buffer_png, format="png")
+            plt.close(fig)
+            return buffer_png.getvalue()
+
+    st.image(figure_cache.get_or_build("correlation_heatmap", data_fingerprint, build_correlation_heatmap))
+
+    # Annual Means
+    with st.expander("Annual Means"):
+        annual_means = figure_cache.get_or_build_aggregate(
+            "annual_means", data_fingerprint, lambda: get_aggregate_cube(data_fingerprint).annual_means()
+        )
+        st.dataframe(annual_means)
 
 # Time Series Forecast
 elif menu_choice == "🔮 Time Series Forecast (ARIMA & Prophet)":
@@ -204,50 +278,59 @@ elif menu_choice == "🔮 Time Series Forecast (ARIMA & Prophet)":
 
     # ARIMA Forecast
     st.write("### ARIMA Forecast")
-    arima_model = ARIMA(df["Temperature_Anomaly_C"], order=(2, 1, 2))
-    arima_result = arima_model.fit()
-    forecast_years = 50
-    forecast_index = pd.date_range(start="2025", periods=forecast_years, freq="YE")
-    forecast = arima_result.forecast(steps=forecast_years)
+
+    def build_arima_chart():
+        arima_model = ARIMA(model_precision(df["Temperature_Anomaly_C"]), order=(2, 1, 2))
+        with span("arima_fit", "model", rows=len(df)):
+            arima_result = arima_model.fit()
+        forecast_years = 50
+        forecast_index = pd.date_range(start="2025", periods=forecast_years, freq="YE")
+        with span("arima_forecast", "model"):
+            forecast = arima_result.forecast(steps=forecast_years)
+
+        fig = go.Figure()
+        fig.add_trace(line_trace(df["Year"], df["Temperature_Anomaly_C"], name="Actual"))
+        fig.add_trace(line_trace(forecast_index.year, forecast, name="Forecast"))
+        fig.update_layout(
+            title="ARIMA Forecast (Next 50 Years)",
+            xaxis_title="Year",
+            yaxis_title="Temperature Anomaly (°C)",
+            template="plotly_dark"
+        )
+        return fig.to_json()
 
     # ARIMA Grafiği
     st.markdown("""
     <div class="forecast-chart">
     """, unsafe_allow_html=True)
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=df["Year"], y=df["Temperature_Anomaly_C"], mode="lines", name="Actual"))
-    fig.add_trace(go.Scatter(x=forecast_index.year, y=forecast, mode="lines", name="Forecast"))
-    fig.update_layout(
-        title="ARIMA Forecast (Next 50 Years)",
-        xaxis_title="Year",
-        yaxis_title="Temperature Anomaly (°C)",
-        template="plotly_dark"
-    )
-    st.plotly_chart(fig)
+    st.plotly_chart(pio.from_json(figure_cache.get_or_build("arima_forecast", data_fingerprint, build_arima_chart)))
     st.markdown("</div>", unsafe_allow_html=True)
 
     # Prophet Forecast
     st.write("### Prophet Forecast")
-    prophet_df = df.rename(columns={"Year": "ds", "Temperature_Anomaly_C": "y"})
-    prophet_model = Prophet()
-    prophet_model.fit(prophet_df)
-    future = prophet_model.make_future_dataframe(periods=50, freq="YE")
-    forecast = prophet_model.predict(future)
+
+    def build_prophet_chart():
+        # Fitted once per dataset (warm-started when the data only grew) and cached on disk
+        prophet_df = prophet_frame(df)
+        with span("prophet_forecast", "model", rows=len(prophet_df)):
+            forecast = load_or_forecast(df, HORIZON_YEARS)
+
+        fig2 = go.Figure()
+        fig2.add_trace(line_trace(prophet_df["ds"], prophet_df["y"], name="Actual"))
+        fig2.add_trace(line_trace(forecast["ds"], forecast["yhat"], name="Forecast"))
+        fig2.update_layout(
+            title=f"Prophet Forecast (Next {HORIZON_YEARS} Years)",
+            xaxis_title="Year",
+            yaxis_title="Temperature Anomaly (°C)",
+            template="plotly_dark"
+        )
+        return fig2.to_json()
 
     # Prophet Grafiği
     st.markdown("""
     <div class="forecast-chart">
     """, unsafe_allow_html=True)
-    fig2 = go.Figure()
-    fig2.add_trace(go.Scatter(x=prophet_df["ds"], y=prophet_df["y"], mode="lines", name="Actual"))
-    fig2.add_trace(go.Scatter(x=future["ds"], y=forecast["yhat"], mode="lines", name="Forecast"))
-    fig2.update_layout(
-        title="Prophet Forecast (Next 50 Years)",
-        xaxis_title="Year",
-        yaxis_title="Temperature Anomaly (°C)",
-        template="plotly_dark"
-    )
-    st.plotly_chart(fig2)
+    st.plotly_chart(pio.from_json(figure_cache.get_or_build("prophet_forecast", data_fingerprint, build_prophet_chart)))
     st.markdown("</div>", unsafe_allow_html=True)
 
     # Özet ve Gelecek Planları
@@ -501,19 +584,30 @@ elif menu_choice == "📋 Generate Reports":
             key="excel_download"
         )
     with col3:
-        st.button(
-            label="Generate PDF (Coming Soon)",
-            help="This feature will allow you to generate a PDF report. Stay tuned!",
-            key="pdf_coming_soon",
-            disabled=True
-        )
+        if st.button(
+            label="Generate PDF",
+            help="Build a PDF report with the analysis charts and scenario tables.",
+            key="pdf_generate"
+        ):
+            with st.spinner("Building PDF report..."):
+                st.session_state["pdf_report_path"] = build_report()
+        if "pdf_report_path" in st.session_state:
+            with open(st.session_state["pdf_report_path"], "rb") as pdf_file:
+                st.download_button(
+                    label="Download PDF",
+                    data=pdf_file.read(),
+                    file_name="global_warming_report.pdf",
+                    mime="application/pdf",
+                    help="Download the generated PDF report.",
+                    key="pdf_download"
+                )
 
     # Ek Raporlama ve Bilgilendirme
     st.markdown("""
     <div class="report-container">
         <p>
-            Note: PDF report generation is under development. Soon, you will be able to create detailed analytical reports 
-            that include visualizations and insights.
+            Note: The PDF report includes the correlation, decomposition, forecast and scenario charts
+            along with per-scenario prediction tables. Charts that are already up to date in the report folder are reused.
         </p>
     </div>
     """, unsafe_allow_html=True)
@@ -665,3 +759,18 @@ elif menu_choice == "ℹ️ About":
         <a href='mailto:piinartp@gmail.com'>Contact Developer</a></p>
     </div>
     """, unsafe_allow_html=True)
+
+# Figure cache statistics
+cache_stats = figure_cache.stats()
+st.sidebar.caption(
+    f"Figure cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+    f"{cache_stats['entries']} entries ({cache_stats['bytes'] / 1e6:.1f} MB)"
+)
+
+# Span timings (GWF_TRACE=1); the trace file (the most recent spans) is rewritten after every rerun
+if instrumentation.ENABLED:
+    with st.sidebar.expander("Timings"):
+        st.text(instrumentation.summary_table())
+    instrumentation.write_trace(os.path.join(
+        os.environ.get(instrumentation.TRACE_DIR_ENV, instrumentation.DEFAULT_TRACE_DIR), f"trace_app_{os.getpid()}.json"
+    ))
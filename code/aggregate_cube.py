@@ -0,0 +1,239 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from fingerprint import frame_fingerprint
+
+CACHE_DIR = ".cache"
+MONTHS = 12
+
+
+class AggregateCube:
+    """
+    Materialized region x year x month x variable aggregates.
+
+    Each cell holds the sum, count, min, max and sum of squares of the non-missing
+    values that fall into it, which is enough to answer means, standard deviations
+    and extremes at any coarser level (annual, monthly climatology, overall)
+    without touching the raw rows again. Datasets without a region column use a
+    single region.
+    """
+
+    def __init__(self, variables, first_year, n_years, regions=(None,), region_col=None, version=None):
+        self.variables = list(variables)
+        self.first_year = int(first_year)
+        self.regions = list(regions)
+        self.region_col = region_col
+        self.version = version
+        shape = (len(self.regions), n_years, MONTHS, len(self.variables))
+        self.sum = np.zeros(shape)
+        self.sumsq = np.zeros(shape)
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.min = np.full(shape, np.inf)
+        self.max = np.full(shape, -np.inf)
+
+    @property
+    def years(self):
+        return np.arange(self.first_year, self.first_year + self.sum.shape[1])
+
+    @staticmethod
+    def default_region_col(data):
+        return "Region" if "Region" in data.columns else None
+
+    @staticmethod
+    def default_variables(data, region_col=None):
+        return [col for col in data.select_dtypes("number").columns if col not in ("Year", "Month", region_col)]
+
+    @classmethod
+    def build(cls, data, variables=None, region_col=None, version=None):
+        if region_col is None:
+            region_col = cls.default_region_col(data)
+        if variables is None:
+            variables = cls.default_variables(data, region_col)
+        regions = sorted(data[region_col].unique()) if region_col else [None]
+        years = data["Year"]
+        cube = cls(variables, years.min(), years.max() - years.min() + 1, regions, region_col, version)
+        return cube.update(data)
+
+    def _grow(self, years, regions):
+        """
+        Extend the year and region axes so that new rows fit.
+        """
+        new_regions = [region for region in regions if region not in self.regions]
+        first_year = min(self.first_year, int(years.min()))
+        last_year = max(self.years[-1], int(years.max()))
+        before = self.first_year - first_year
+        after = last_year - self.years[-1]
+        if not new_regions and not before and not after:
+            return
+        pad = ((0, len(new_regions)), (before, after), (0, 0), (0, 0))
+        self.sum = np.pad(self.sum, pad)
+        self.sumsq = np.pad(self.sumsq, pad)
+        self.count = np.pad(self.count, pad)
+        self.min = np.pad(self.min, pad, constant_values=np.inf)
+        self.max = np.pad(self.max, pad, constant_values=-np.inf)
+        self.first_year = first_year
+        self.regions += new_regions
+
+    def update(self, data):
+        """
+        Accumulate ``data`` (e.g. newly appended months) into the cube.
+        """
+        regions = data[self.region_col].to_numpy() if self.region_col else None
+        self._grow(data["Year"].to_numpy(), [] if regions is None else pd.unique(regions))
+
+        n_years = self.sum.shape[1]
+        region_index = 0 if regions is None else \
+            pd.Index(self.regions).get_indexer(regions)
+        year_index = data["Year"].to_numpy().astype(np.int64) - self.first_year
+        month_index = data["Month"].to_numpy().astype(np.int64) - 1
+        cell = (region_index * n_years + year_index) * MONTHS + month_index
+        n_cells = self.sum.shape[0] * n_years * MONTHS
+
+        values = data[self.variables].to_numpy(dtype="float64")
+        present = ~np.isnan(values)
+        filled = np.where(present, values, 0.0)
+        for i in range(len(self.variables)):
+            weights = filled[:, i]
+            self.sum[..., i] += np.bincount(cell, weights=weights, minlength=n_cells).reshape(self.sum.shape[:3])
+            self.sumsq[..., i] += np.bincount(cell, weights=weights * weights, minlength=n_cells).reshape(self.sum.shape[:3])
+            self.count[..., i] += np.bincount(cell, weights=present[:, i], minlength=n_cells).reshape(self.sum.shape[:3]).astype(np.int64)
+            low = self.min[..., i].reshape(-1)
+            high = self.max[..., i].reshape(-1)
+            np.fmin.at(low, cell, values[:, i])
+            np.fmax.at(high, cell, values[:, i])
+            self.min[..., i] = low.reshape(self.sum.shape[:3])
+            self.max[..., i] = high.reshape(self.sum.shape[:3])
+        return self
+
+    def _reduce(self, axes, region=None):
+        """
+        Sum, count, sumsq, min and max collapsed over ``axes`` (after region selection).
+        """
+        select = slice(None) if region is None else [self.regions.index(region)]
+        arrays = [self.sum[select], self.count[select], self.sumsq[select], self.min[select], self.max[select]]
+        axes = tuple(axes)
+        return (arrays[0].sum(axis=axes), arrays[1].sum(axis=axes), arrays[2].sum(axis=axes),
+                arrays[3].min(axis=axes), arrays[4].max(axis=axes))
+
+    @staticmethod
+    def _mean(total, count):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(count > 0, total / count, np.nan)
+
+    def year_month_mean(self, variable, region=None):
+        """
+        Year x month table of means for one variable (the heatmap layout).
+        """
+        total, count, _, _, _ = self._reduce((0,), region)
+        i = self.variables.index(variable)
+        return pd.DataFrame(self._mean(total[..., i], count[..., i]), index=pd.Index(self.years, name="Year"),
+                            columns=pd.Index(range(1, MONTHS + 1), name="Month"))
+
+    def annual_means(self, variables=None, region=None):
+        """
+        Mean of each variable per year, weighted by the number of observations.
+        """
+        total, count, _, _, _ = self._reduce((0, 2), region)
+        result = pd.DataFrame(self._mean(total, count), index=pd.Index(self.years, name="Year"), columns=self.variables)
+        result = result[result.index.isin(self.years[count.sum(axis=1) > 0])]
+        return result if variables is None else result[list(variables)]
+
+    def summary(self, variables=None, region=None):
+        """
+        Overall count, mean, std (ddof=1), min and max of each variable.
+        """
+        total, count, sumsq, low, high = self._reduce((0, 1, 2), region)
+        mean = self._mean(total, count)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            variance = np.where(count > 1, (sumsq - count * mean * mean) / (count - 1), np.nan)
+        result = pd.DataFrame({
+            "count": count,
+            "mean": mean,
+            "std": np.sqrt(np.clip(variance, 0, None)),
+            "min": np.where(count > 0, low, np.nan),
+            "max": np.where(count > 0, high, np.nan)
+        }, index=self.variables)
+        return result if variables is None else result.loc[list(variables)]
+
+    def save(self, path):
+        # Written under a per-process name and renamed, so concurrent stages never read a partial file
+        partial = f"{path}.{os.getpid()}.tmp"
+        with open(partial, "wb") as handle:
+            np.savez(handle, sum=self.sum, sumsq=self.sumsq, count=self.count, min=self.min, max=self.max,
+                     variables=np.array(self.variables), regions=np.array(self.regions, dtype=object),
+                     first_year=self.first_year, region_col=str(self.region_col or ""),
+                     version=str(self.version or ""))
+        os.replace(partial, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=True) as stored:
+            cube = cls(stored["variables"].tolist(), int(stored["first_year"]), stored["sum"].shape[1],
+                       stored["regions"].tolist(), str(stored["region_col"]) or None, str(stored["version"]) or None)
+            for name in ("sum", "sumsq", "count", "min", "max"):
+                setattr(cube, name, stored[name])
+        return cube
+
+
+def _cube_path(cache_dir, version):
+    return os.path.join(cache_dir, f"cube_{version[:16]}.npz")
+
+
+def _state_path(cache_dir):
+    return os.path.join(cache_dir, "cube_state.json")
+
+
+def _update_previous(data, cache_dir, variables, version):
+    """
+    Return the last cached cube updated with the rows appended since, or None
+    when ``data`` does not extend the dataset that cube was built from.
+    """
+    state_path = _state_path(cache_dir)
+    if not os.path.exists(state_path):
+        return None
+    with open(state_path, "r", encoding="utf-8") as handle:
+        state = json.load(handle)
+    previous = _cube_path(cache_dir, state["version"])
+    if state["rows"] > len(data) or not os.path.exists(previous):
+        return None
+    cube = AggregateCube.load(previous)
+    if not set(variables) <= set(cube.variables):
+        return None
+    if frame_fingerprint(data.iloc[:state["rows"]]) != state["version"]:
+        return None
+    cube.version = version
+    return cube.update(data.iloc[state["rows"]:])
+
+
+def load_or_build_cube(data, cache_dir=CACHE_DIR, variables=None):
+    """
+    Return the cube for this dataset version, building and caching it on first use.
+
+    When the dataset has only grown since the last cube was cached, that cube is
+    updated with just the new rows. A cached cube is only replaced by one holding
+    at least its variables, so asking for a subset never drops the others.
+    """
+    version = frame_fingerprint(data)
+    path = _cube_path(cache_dir, version)
+    if variables is None:
+        variables = AggregateCube.default_variables(data, AggregateCube.default_region_col(data))
+    cached = AggregateCube.load(path) if os.path.exists(path) else None
+    if cached is not None:
+        if set(variables) <= set(cached.variables):
+            return cached
+        variables = cached.variables + [variable for variable in variables if variable not in cached.variables]
+
+    cube = _update_previous(data, cache_dir, variables, version)
+    if cube is None:
+        cube = AggregateCube.build(data, variables=variables, version=version)
+    os.makedirs(cache_dir, exist_ok=True)
+    cube.save(path)
+    state_path = _state_path(cache_dir)
+    partial = f"{state_path}.{os.getpid()}.tmp"
+    with open(partial, "w", encoding="utf-8") as handle:
+        json.dump({"rows": len(data), "version": version}, handle)
+    os.replace(partial, state_path)
+    return cube
@@ -0,0 +1,353 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from aggregate_cube import AggregateCube
+from correlation import CACHE_DIR as CORRELATION_CACHE_DIR
+from correlation import compute_correlation, load_or_compute_correlation
+from data_generation import generate_dataset
+from data_preprocessing import clean_dataset, fill_missing, homogeneity_check, remove_outliers_zscore
+from decomposition import batched_decompose
+from downsampling import downsample_frame, line_trace, render_mode
+from fingerprint import frame_fingerprint
+from prophet_forecast import HORIZON_YEARS, forecast_years, load_or_forecast, prophet_frame
+from prophet_forecast import fit_prophet as fit_prophet_model
+from rolling_features import rolling_features
+from scenario_model import TARGET, ScenarioModel
+from scenario_store import ScenarioStore, load_or_build_store
+from schema import apply_schema
+import simulation
+from storage import read_dataset, write_dataset
+import visualization
+
+SIZES = (300, 100_000, 1_000_000, 10_000_000)
+# Months per synthetic region: 2000-2024, the span of data_generation.generate_dataset
+REGION_LENGTH = 300
+# Regions simulated individually; larger datasets repeat them, keeping 10M-row builds fast
+DISTINCT_REGIONS = 256
+BASELINE_PATH = "benchmarks/baseline.json"
+RESULTS_PATH = "benchmarks/latest.json"
+# A stage regresses when it is this much slower (or hungrier) than the baseline...
+DEFAULT_THRESHOLD = 0.2
+# ...and the absolute difference exceeds timer / allocator noise
+MIN_SECONDS = 0.01
+MIN_MEGABYTES = 1.0
+# Largest dataset whose per-region decomposition figures are rendered (9 figures per region)
+DECOMPOSITION_FIGURE_ROWS = 3_000
+
+
+# Synthetic data from data_generation.py
+def synthetic_dataset(n_rows, seed=42):
+    """
+    Build ``n_rows`` of data as consecutive regions, each one run of data_generation.generate_dataset.
+
+    Year stays within 2000-2024 at any size and the ``Region`` column identifies
+    each series. Only the first ``DISTINCT_REGIONS`` regions are simulated (with
+    seeds ``seed``, ``seed + 1``, ...); later regions repeat them.
+    """
+    n_regions = -(-n_rows // REGION_LENGTH)
+    base = apply_schema(pd.concat(
+        [generate_dataset(seed=seed + region) for region in range(min(n_regions, DISTINCT_REGIONS))],
+        ignore_index=True
+    ))
+    df = base.take(np.arange(n_rows) % len(base)).reset_index(drop=True)
+    df.insert(0, "Region", (np.arange(n_rows) // REGION_LENGTH).astype("int32"))
+    return df
+
+
+def measurement_columns(data):
+    return [col for col in data.select_dtypes("number").columns if col not in ("Region", "Year", "Month")]
+
+
+# Stage workloads (mirroring the scripts and app pages)
+def preprocess(data):
+    # data_preprocessing.main without its printed and plotted exploration
+    data = fill_missing(data)
+    homogeneity_check(data, measurement_columns(data))
+    return clean_dataset(data)
+
+
+def remove_outliers(data, threshold=3):
+    return remove_outliers_zscore(data, threshold, measurement_columns(data))
+
+
+def fit_regression(data):
+    model, X_test, y_test = simulation.fit_model(data)
+    model.predict(X_test)
+    return model
+
+
+def simulate_scenarios(model, data):
+    return simulation.simulate_scenarios(model, data)
+
+
+def fit_arima(data):
+    from statsmodels.tools.sm_exceptions import EstimationWarning
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", EstimationWarning)
+        return simulation.forecast_arima(data)
+
+
+def fit_prophet(data):
+    # Cold fit, as on the first request for a dataset
+    return forecast_years(fit_prophet_model(prophet_frame(data)))
+
+
+def _prophet_cache(data, workdir):
+    cache_dir = os.path.join(workdir, "prophet")
+    load_or_forecast(data, cache_dir=cache_dir)
+    return data, HORIZON_YEARS, 0, 1000, cache_dir
+
+
+def render_annual_heatmap(data, cube, output_dir):
+    with contextlib.redirect_stdout(io.StringIO()):
+        visualization.annual_temperature_heatmap(
+            data, cube=cube, output_path=os.path.join(output_dir, "annual_temperature_heatmap.png")
+        )
+
+
+def chart_stage(chart, **kwargs):
+    """
+    Stage runner calling a visualization.py chart as its ``main`` does.
+
+    It runs from the work directory, so relative output paths and the charts'
+    ``.cache`` stay there, and the charts' "Saved:" lines are silenced.
+    """
+    def run(data, workdir):
+        with contextlib.chdir(workdir), contextlib.redirect_stdout(io.StringIO()):
+            chart(data, **kwargs)
+    return run
+
+
+def _warm_correlation(data, workdir):
+    # As visualization.main, which warms the correlation cache before rendering
+    load_or_compute_correlation(data, cache_dir=os.path.join(workdir, CORRELATION_CACHE_DIR))
+    return data, workdir
+
+
+def app_correlation_heatmap(data, workdir):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    matrix = load_or_compute_correlation(data, cache_dir=os.path.join(workdir, CORRELATION_CACHE_DIR)).matrix
+    fig, ax = plt.subplots(figsize=(12, 8))
+    sns.heatmap(matrix, annot=True, fmt=".2f", cmap="coolwarm", ax=ax)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def app_arima_chart(data):
+    import plotly.graph_objects as go
+    years, forecast = fit_arima(data)
+    fig = go.Figure()
+    fig.add_trace(line_trace(data["Year"], data[TARGET], name="Actual"))
+    fig.add_trace(line_trace(years, forecast, name="Forecast"))
+    fig.update_layout(title="ARIMA Forecast (Next 50 Years)", xaxis_title="Year",
+                      yaxis_title="Temperature Anomaly (°C)", template="plotly_dark")
+    return fig.to_json()
+
+
+def _scenario_source(data, workdir):
+    # As the app: the scenario store when the dataset is small enough, otherwise the reduced model
+    try:
+        return data, load_or_build_store(data, cache_dir=os.path.join(workdir, "scenario_store"))
+    except ValueError:
+        return data, ScenarioModel.fit(data)
+
+
+def app_scenario_chart(data, source, changes=(5.0, 25.0, 2.5)):
+    import plotly.express as px
+    scenario_df = data[["Year", TARGET]].copy()
+    if isinstance(source, ScenarioStore):
+        scenario_df["Predicted_Temperature_Anomaly_C"] = source.lookup(*changes)[0]
+    else:
+        scenario_df["Predicted_Temperature_Anomaly_C"] = source.predict_series(changes)[0]
+    y_columns = [TARGET, "Predicted_Temperature_Anomaly_C"]
+    return px.line(downsample_frame(scenario_df, "Year", y_columns), x="Year", y=y_columns,
+                   render_mode=render_mode(len(scenario_df))).to_json()
+
+
+def _write_dataset(data, workdir):
+    return write_dataset(data, os.path.join(workdir, "dataset.csv"))
+
+
+def _data(data, workdir):
+    return (data,)
+
+
+def _data_workdir(data, workdir):
+    return data, workdir
+
+
+def benchmark_stages():
+    """
+    (name, prepare, run, max_rows) for every benchmarked stage.
+
+    ``prepare(data, workdir)`` builds the inputs of ``run`` outside the timed
+    region. Stages are skipped for datasets larger than ``max_rows``.
+    """
+    return [
+        ("generate", lambda data, workdir: (len(data),), synthetic_dataset, None),
+        ("write_dataset", lambda data, workdir: (data, os.path.join(workdir, "dataset.csv")), write_dataset, None),
+        ("read_dataset", lambda data, workdir: (_write_dataset(data, workdir),), read_dataset, None),
+        ("preprocess", _data, preprocess, None),
+        ("outlier_removal", _data, remove_outliers, None),
+        ("correlation", _data, compute_correlation, None),
+        ("regression_fit", _data, fit_regression, None),
+        ("scenario_simulation", lambda data, workdir: (fit_regression(data), data), simulate_scenarios, None),
+        ("arima_fit", _data, fit_arima, 100_000),
+        ("prophet_fit", _data, fit_prophet, None),
+        ("prophet_cached", _prophet_cache, load_or_forecast, None),
+        ("rolling_features", lambda data, workdir: (data, [TARGET], (12,), ("mean",)), rolling_features, None),
+        # Decomposing every column needs several GB beyond 1M rows
+        ("decomposition", lambda data, workdir: (data, measurement_columns(data), 12, "Region"), batched_decompose, 1_000_000),
+        ("aggregate_cube", _data, AggregateCube.build, None),
+        ("downsample", lambda data, workdir: (data, "Year", [TARGET]), downsample_frame, None),
+        ("render_heatmap", lambda data, workdir: (data, AggregateCube.build(data), workdir), render_annual_heatmap, None),
+        ("render_clustered_correlation", _warm_correlation, chart_stage(
+            visualization.advanced_correlation_heatmap, output_path="advanced_correlation_heatmap.png"), None),
+        # Every point is embedded in the HTML
+        ("render_3d_scatter_html", _data_workdir, chart_stage(
+            visualization.interactive_3d_scatter, x="CO2_Concentration_ppm", y="CH4_Concentration_ppb", z=TARGET,
+            color="Year", output_path="interactive_3d_scatter.html"), 1_000_000),
+        ("render_line_chart_html", _data_workdir, chart_stage(
+            visualization.interactive_line_chart, x="Year", y=TARGET, color="Year",
+            output_path="interactive_line_chart.html"), None),
+        ("render_rolling_chart", _data_workdir, chart_stage(
+            visualization.line_chart_with_rolling_averages, column=TARGET, output_path="rolling_average_chart.png"), None),
+        # seasonal_decompose's plot draws every point
+        ("render_decomposition", _data_workdir, chart_stage(
+            visualization.time_series_decomposition, column=TARGET, output_path="time_series_decomposition.png"), 1_000_000),
+        # One figure per variable and region
+        ("render_decomposition_batch", _data_workdir, chart_stage(
+            visualization.batched_time_series_decomposition, output_dir="decomposition",
+            components_path="decomposition_components.csv"), DECOMPOSITION_FIGURE_ROWS),
+        ("app_fingerprint", _data, frame_fingerprint, None),
+        ("app_scenario_chart", _scenario_source, app_scenario_chart, None),
+        ("app_correlation_heatmap", _warm_correlation, app_correlation_heatmap, None),
+        ("app_arima_chart", _data, app_arima_chart, 100_000),
+        ("app_annual_means", lambda data, workdir: (AggregateCube.build(data),), lambda cube: cube.annual_means(), None)
+    ]
+
+
+# Measurement
+def measure(run, args, repeat=3, memory=True):
+    """
+    Best-of-``repeat`` wall time, plus the tracemalloc peak of one extra run.
+
+    tracemalloc sees Python and numpy allocations only; memory owned by pyarrow
+    (e.g. memory-mapped feather reads) is not counted.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(*args)
+        timings.append(time.perf_counter() - start)
+    peak_mb = None
+    if memory:
+        tracemalloc.start()
+        try:
+            run(*args)
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return {"seconds": min(timings), "median_seconds": float(np.median(timings)), "peak_mb": peak_mb}
+
+
+def run_benchmarks(sizes=SIZES, stages=None, repeat=3, memory=True):
+    """
+    Time and memory-profile every stage at every size; returns a JSON-ready dict.
+    """
+    selected = [stage for stage in benchmark_stages() if stages is None or stage[0] in stages]
+    results = []
+    with tempfile.TemporaryDirectory() as workdir, warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for rows in sizes:
+            data = synthetic_dataset(rows)
+            for name, prepare, run, max_rows in selected:
+                if max_rows is not None and rows > max_rows:
+                    results.append({"stage": name, "rows": rows, "skipped": True})
+                    print(f"{name:22s} {rows:>10,d} rows  skipped (limit {max_rows:,d})")
+                    continue
+                measurement = measure(run, prepare(data, workdir), repeat if rows <= 100_000 else 1, memory)
+                results.append({"stage": name, "rows": rows, **measurement})
+                peak = "" if measurement["peak_mb"] is None else f"{measurement['peak_mb']:10.1f} MB"
+                print(f"{name:22s} {rows:>10,d} rows {measurement['seconds']:10.4f} s {peak}")
+            del data
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "results": results
+    }
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Return the measurements in ``report`` that regressed against ``baseline``.
+    """
+    reference = {(entry["stage"], entry["rows"]): entry for entry in baseline["results"] if not entry.get("skipped")}
+    regressions = []
+    for entry in report["results"]:
+        base = reference.get((entry["stage"], entry["rows"]))
+        if base is None or entry.get("skipped"):
+            continue
+        for metric, floor in (("seconds", MIN_SECONDS), ("peak_mb", MIN_MEGABYTES)):
+            new, old = entry.get(metric), base.get(metric)
+            if new is None or old is None:
+                continue
+            if new > old * (1 + threshold) and new - old > floor:
+                regressions.append({"stage": entry["stage"], "rows": entry["rows"], "metric": metric,
+                                    "baseline": old, "current": new, "ratio": new / old if old else float("inf")})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on synthetic data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="dataset sizes in rows")
+    parser.add_argument("--stages", nargs="+", help="only run these stages")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage (1 above 100k rows)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--output", default=RESULTS_PATH, help="where to write the results")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed relative slowdown")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.stages, args.repeat, not args.no_memory)
+    targets = [args.output] + ([args.baseline] if args.save_baseline else [])
+    for path in targets:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Saved: {path}")
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline, encoding="utf-8") as handle:
+        regressions = compare(report, json.load(handle), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression['stage']} at {regression['rows']:,d} rows: {regression['metric']} "
+              f"{regression['baseline']:.4f} -> {regression['current']:.4f} ({regression['ratio']:.2f}x)")
+    if not regressions:
+        print(f"No regressions against {args.baseline} (threshold {args.threshold:.0%}).")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
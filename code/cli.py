@@ -0,0 +1,121 @@
+import argparse
+import os
+import sys
+
+from correlation import CHUNK_SIZE
+
+RAW_DATASET = "global_warming_sim_dataset.csv"
+CLEANED_DATASET = "fully_cleaned_global_warming_sim_dataset.csv"
+REPORT_DIR = "report"
+REPORT_PATH = "report/global_warming_report.pdf"
+STAGES = ("generate", "preprocess", "simulate", "visualize", "report")
+
+
+# Stage entry points. Modules are imported lazily so that e.g. `generate` does not load statsmodels.
+def generate(output_path=RAW_DATASET, fmt=None, seed=42):
+    import data_generation
+    return data_generation.main(output_path, fmt, seed)
+
+
+def preprocess(input_path=RAW_DATASET, output_path=CLEANED_DATASET, fmt=None, show_plots=False, chunk_size=CHUNK_SIZE,
+               streaming=False):
+    import data_preprocessing
+    if streaming:
+        output_path = data_preprocessing.clean_dataset_streaming(input_path, output_path, fmt, chunk_size=chunk_size)
+        print(f"Cleaned dataset streamed to '{output_path}'.")
+        return output_path
+    return data_preprocessing.main(input_path, output_path, fmt, show_plots, chunk_size)
+
+
+def simulate(input_path=CLEANED_DATASET, report_dir=REPORT_DIR, workers=1, chunk_size=CHUNK_SIZE):
+    import simulation
+    return simulation.main(input_path, report_dir, workers, chunk_size)
+
+
+def visualize(input_path=CLEANED_DATASET, report_dir=REPORT_DIR, workers=1, chunk_size=CHUNK_SIZE):
+    import visualization
+    return visualization.main(input_path, report_dir, workers, chunk_size)
+
+
+def report(input_path=CLEANED_DATASET, output_path=REPORT_PATH, report_dir=REPORT_DIR, workers=None, force=False):
+    from report_builder import build_report
+    return build_report(input_path, output_path, report_dir, workers, force)
+
+
+def run_all(raw_path=RAW_DATASET, cleaned_path=CLEANED_DATASET, report_dir=REPORT_DIR, fmt=None,
+            workers=1, chunk_size=CHUNK_SIZE, force=False):
+    """
+    Run every stage in order in this process.
+    """
+    generate(raw_path, fmt)
+    preprocess(raw_path, cleaned_path, fmt, chunk_size=chunk_size)
+    simulate(cleaned_path, report_dir, workers, chunk_size)
+    visualize(cleaned_path, report_dir, workers, chunk_size)
+    return report(cleaned_path, os.path.join(report_dir, os.path.basename(REPORT_PATH)), report_dir, workers, force)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Global warming data, simulation and report pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(command, input_default=None, workers=True, chunk_size=True, fmt=False):
+        if input_default is not None:
+            command.add_argument("--input", default=input_default, help=f"input dataset (default: {input_default})")
+        if workers:
+            command.add_argument("--workers", type=int, default=1, help="worker processes for rendering")
+        if chunk_size:
+            command.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="rows per chunk in streaming passes")
+        if fmt:
+            command.add_argument("--format", choices=["csv", "feather", "parquet"], help="dataset format to write")
+
+    command = commands.add_parser("generate", help="simulate the raw dataset")
+    command.add_argument("--output", default=RAW_DATASET)
+    command.add_argument("--seed", type=int, default=42)
+    add_common(command, workers=False, chunk_size=False, fmt=True)
+
+    command = commands.add_parser("preprocess", help="analyse and clean the raw dataset")
+    command.add_argument("--output", default=CLEANED_DATASET)
+    command.add_argument("--show-plots", action="store_true", help="show the exploratory plots")
+    command.add_argument("--streaming", action="store_true",
+                         help="clean chunk by chunk in constant memory, without the exploratory analysis")
+    add_common(command, RAW_DATASET, workers=False, fmt=True)
+
+    for name, help_text in (("simulate", "fit, forecast and simulate scenarios"), ("visualize", "render the advanced visualizations")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--report-dir", default=REPORT_DIR)
+        add_common(command, CLEANED_DATASET)
+
+    command = commands.add_parser("report", help="assemble the PDF report")
+    command.add_argument("--output", default=REPORT_PATH)
+    command.add_argument("--report-dir", default=REPORT_DIR)
+    command.add_argument("--force", action="store_true", help="re-render every figure")
+    add_common(command, CLEANED_DATASET, chunk_size=False)
+
+    command = commands.add_parser("all", help="run every stage in order")
+    command.add_argument("--raw", default=RAW_DATASET)
+    command.add_argument("--cleaned", default=CLEANED_DATASET)
+    command.add_argument("--report-dir", default=REPORT_DIR)
+    command.add_argument("--force", action="store_true", help="re-render every report figure")
+    add_common(command, fmt=True)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "generate":
+        generate(args.output, args.format, args.seed)
+    elif args.command == "preprocess":
+        preprocess(args.input, args.output, args.format, args.show_plots, args.chunk_size, args.streaming)
+    elif args.command == "simulate":
+        simulate(args.input, args.report_dir, args.workers, args.chunk_size)
+    elif args.command == "visualize":
+        visualize(args.input, args.report_dir, args.workers, args.chunk_size)
+    elif args.command == "report":
+        report(args.input, args.output, args.report_dir, args.workers, args.force)
+    else:
+        run_all(args.raw, args.cleaned, args.report_dir, args.format, args.workers, args.chunk_size, args.force)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
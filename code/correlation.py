@@ -0,0 +1,142 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from fingerprint import frame_fingerprint
+
+CACHE_DIR = ".cache"
+CHUNK_SIZE = 65536
+
+
+class CorrelationAccumulator:
+    """
+    Streaming pairwise-complete Pearson correlation from cross-product sums.
+
+    Chunks are standardised with the shift and scale of the first chunk and
+    multiplied in float32; the per-chunk products are accumulated in float64.
+    Missing values are handled pairwise, like ``DataFrame.corr``.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.shift = None
+        self.scale = None
+        self.n = np.zeros((k, k))
+        self.sums = np.zeros((k, k))
+        self.squares = np.zeros((k, k))
+        self.cross = np.zeros((k, k))
+
+    def add(self, chunk):
+        values = chunk[self.columns].to_numpy(dtype="float64") if isinstance(chunk, pd.DataFrame) \
+            else np.asarray(chunk, dtype="float64")
+        if self.shift is None:
+            self.shift = np.nan_to_num(np.nanmean(values, axis=0))
+            scale = np.nan_to_num(np.nanstd(values, axis=0))
+            self.scale = np.where(scale > 0, scale, 1.0)
+        present = ~np.isnan(values)
+        z = np.where(present, (values - self.shift) / self.scale, 0.0).astype("float32")
+        mask = present.astype("float32")
+        # Entry [i, j] only counts rows where both column i and column j are present
+        self.n += mask.T @ mask
+        self.sums += z.T @ mask
+        self.squares += (z * z).T @ mask
+        self.cross += z.T @ z
+        return self
+
+    def correlation(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_i = self.sums / self.n
+            mean_j = mean_i.T
+            cov = self.cross / self.n - mean_i * mean_j
+            var_i = self.squares / self.n - mean_i * mean_i
+            corr = cov / np.sqrt(var_i * var_i.T)
+        corr = np.clip(corr, -1.0, 1.0)
+        np.fill_diagonal(corr, np.where(np.diag(self.n) > 1, 1.0, np.nan))
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+class CorrelationResult:
+    """
+    A correlation matrix together with the hierarchical linkage used to order it.
+    """
+
+    def __init__(self, matrix, linkage, version=None):
+        self.matrix = matrix
+        self.linkage = linkage
+        self.version = version
+
+    def save(self, path):
+        # Written under a per-process name and renamed, so concurrent stages never read a partial file
+        partial = f"{path}.{os.getpid()}.tmp"
+        with open(partial, "wb") as handle:
+            np.savez(handle, matrix=self.matrix.to_numpy(), linkage=self.linkage,
+                     columns=np.array(self.matrix.columns, dtype=str), version=str(self.version or ""))
+        os.replace(partial, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as stored:
+            columns = stored["columns"].tolist()
+            matrix = pd.DataFrame(stored["matrix"], index=columns, columns=columns)
+            return cls(matrix, stored["linkage"], str(stored["version"]) or None)
+
+
+def cluster_linkage(matrix, method="average"):
+    """
+    Linkage over the rows of the correlation matrix, as ``sns.clustermap`` computes it.
+    """
+    from scipy.cluster.hierarchy import linkage
+    return linkage(np.nan_to_num(matrix.to_numpy()), method=method, metric="euclidean")
+
+
+def compute_correlation(data, columns=None, chunk_size=CHUNK_SIZE):
+    """
+    Correlation matrix of ``data`` accumulated chunk by chunk.
+    """
+    columns = list(columns) if columns is not None else list(data.select_dtypes("number").columns)
+    accumulator = CorrelationAccumulator(columns)
+    for start in range(0, len(data), chunk_size):
+        accumulator.add(data.iloc[start:start + chunk_size])
+    return accumulator.correlation()
+
+
+def load_or_compute_correlation(data, columns=None, cache_dir=CACHE_DIR, chunk_size=CHUNK_SIZE):
+    """
+    Return the correlation matrix and linkage for this dataset version, cached on disk.
+    """
+    columns = list(columns) if columns is not None else list(data.select_dtypes("number").columns)
+    version = frame_fingerprint(data[columns])
+    path = os.path.join(cache_dir, f"correlation_{version[:16]}.npz")
+    if os.path.exists(path):
+        return CorrelationResult.load(path)
+    matrix = compute_correlation(data, columns, chunk_size)
+    result = CorrelationResult(matrix, cluster_linkage(matrix), version)
+    os.makedirs(cache_dir, exist_ok=True)
+    result.save(path)
+    return result
+
+
+def render_correlation_heatmap(result, output_path, title="Correlation Matrix Heatmap", clustered=False, annot=None):
+    """
+    Draw a (optionally clustered) heatmap from a cached correlation result.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    annot = len(result.matrix) <= 20 if annot is None else annot
+    if clustered:
+        grid = sns.clustermap(
+            result.matrix, row_linkage=result.linkage, col_linkage=result.linkage,
+            annot=annot, fmt=".2f", cmap="coolwarm", figsize=(12, 10), cbar_kws={'label': 'Correlation'}
+        )
+        grid.figure.subplots_adjust(top=0.93)
+        grid.figure.suptitle(title)
+        grid.savefig(output_path)
+        plt.close(grid.figure)
+    else:
+        fig, ax = plt.subplots(figsize=(10, 8))
+        sns.heatmap(result.matrix, annot=annot, fmt=".2f", cmap="coolwarm", ax=ax)
+        ax.set_title(title)
+        fig.savefig(output_path)
+        plt.close(fig)
@@ -4,62 +4,81 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy.stats import levene, shapiro, kurtosis, skew
 
-# Load the dataset
-df = pd.read_csv("global_warming_sim_dataset.csv")
+from correlation import CHUNK_SIZE, compute_correlation
+from instrumentation import span
+from schema import apply_schema
+from storage import DatasetWriter, iter_dataset_chunks, read_dataset, write_dataset
 
-# Summary statistics for an overview
-print("\nDetailed Summary Statistics:")
-print(df.describe(include='all'))
+RAW_DATASET = "global_warming_sim_dataset.csv"
+CLEANED_DATASET = "fully_cleaned_global_warming_sim_dataset.csv"
+# Outlier statistics are accumulated over fixed blocks of input rows, so the
+# in-memory and streaming paths sum in the same order and agree exactly
+STATS_BLOCK = 4096
+# Rows the streaming path may hold back while waiting for a column's first value
+MAX_LOOKAHEAD = 1_000_000
+
+
+def numerical_columns(data):
+    return data.select_dtypes(include=[np.number]).columns
 
-# Check for missing values
-print("\nMissing Values Check:")
-print(df.isnull().sum())
 
 # Fill missing values (if any)
-if df.isnull().sum().any():
-    df.fillna(method='ffill', inplace=True)
-    df.fillna(method='bfill', inplace=True)
+def fill_missing(df):
+    """
+    Fill gaps with forward fill, then backward fill for leading gaps.
+
+    Integer columns get their schema types back; float precision is kept.
+    """
+    if not df.isnull().sum().any():
+        return apply_schema(df, floats=False)
+    with span("fill_missing", "clean", rows=len(df)):
+        df = apply_schema(df.ffill().bfill(), floats=False)
     print("Missing values filled using forward and backward fill methods.")
+    return df
 
-# Homogeneity check for all numerical columns
-numerical_columns = df.select_dtypes(include=[np.number]).columns
 
-print("\nHomogeneity Check for Numerical Columns (Levene's Test):")
-homogeneity_results = {}
-for col in numerical_columns:
-    stat, p = levene(df[col], df[col].mean())
-    homogeneity_results[col] = {"Levene's Stat": stat, "p-value": p, "Homogeneous": p > 0.05}
+# Homogeneity check for all numerical columns
+def homogeneity_check(df, columns=None):
+    homogeneity_results = {}
+    for col in numerical_columns(df) if columns is None else columns:
+        stat, p = levene(df[col], df[col].mean())
+        homogeneity_results[col] = {"Levene's Stat": stat, "p-value": p, "Homogeneous": p > 0.05}
+    return pd.DataFrame(homogeneity_results).T
 
-homogeneity_df = pd.DataFrame(homogeneity_results).T
-print(homogeneity_df)
 
 # Advanced statistical analysis
-print("\nAdvanced Statistical Metrics:")
-for col in numerical_columns:
-    col_data = df[col]
-    skewness = skew(col_data)
-    kurt = kurtosis(col_data)
-    normality_stat, normality_p = shapiro(col_data)
-
-    print(f"\nColumn: {col}")
-    print(f"  Skewness: {skewness:.2f} (Should be near 0 for symmetry)")
-    print(f"  Kurtosis: {kurt:.2f} (Should be near 3 for normal distribution)")
-    print(f"  Shapiro-Wilk Test p-value: {normality_p:.5f} (p > 0.05 indicates normality)")
+def print_distribution_metrics(df, columns=None):
+    for col in numerical_columns(df) if columns is None else columns:
+        col_data = df[col]
+        skewness = skew(col_data)
+        kurt = kurtosis(col_data)
+        normality_stat, normality_p = shapiro(col_data)
+
+        print(f"\nColumn: {col}")
+        print(f"  Skewness: {skewness:.2f} (Should be near 0 for symmetry)")
+        print(f"  Kurtosis: {kurt:.2f} (Should be near 3 for normal distribution)")
+        print(f"  Shapiro-Wilk Test p-value: {normality_p:.5f} (p > 0.05 indicates normality)")
+
 
 # Visualizing distributions
-print("\nPlotting Distributions for Numerical Columns:")
-for col in numerical_columns:
-    plt.figure(figsize=(8, 4))
-    sns.histplot(df[col], kde=True, bins=30, color='blue')
-    plt.title(f"Distribution of {col}")
-    plt.xlabel(col)
-    plt.ylabel('Frequency')
+def plot_distributions(df, columns=None):
+    columns = numerical_columns(df) if columns is None else columns
+    print("\nPlotting Distributions for Numerical Columns:")
+    for col in columns:
+        plt.figure(figsize=(8, 4))
+        sns.histplot(df[col], kde=True, bins=30, color='blue')
+        plt.title(f"Distribution of {col}")
+        plt.xlabel(col)
+        plt.ylabel('Frequency')
+        plt.show()
+        plt.close()
+
+    # Pairplot for overall distribution and correlation analysis
+    print("\nGenerating Pairplot for Correlation Analysis...")
+    sns.pairplot(df[columns], diag_kind='kde', palette='viridis')
     plt.show()
+    plt.close("all")
 
-# Pairplot for overall distribution and correlation analysis
-print("\nGenerating Pairplot for Correlation Analysis...")
-sns.pairplot(df[numerical_columns], diag_kind='kde', palette='viridis')
-plt.show()
 
 # Outlier detection using Z-score
 def detect_outliers_zscore(data, column, threshold=3):
@@ -71,39 +90,228 @@ def detect_outliers_zscore(data, column, threshold=3):
     z_scores = (data[column] - mean_col) / std_col
     return data[np.abs(z_scores) > threshold]
 
-print("\nOutlier Detection Using Z-Score:")
-outlier_counts = {}
-for col in numerical_columns:
-    outliers = detect_outliers_zscore(df, col)
-    outlier_counts[col] = len(outliers)
-    print(f"Outliers in {col}: {len(outliers)}")
+
+class BlockedMoments:
+    """
+    Mean and sample standard deviation of a column fed in row order, possibly in pieces.
+
+    Values are grouped into blocks of ``block_size`` input rows (by their original
+    row ``positions``); each block is reduced on its own and the blocks are merged
+    in order with Chan's update, so the result does not depend on how the rows
+    were chunked. Missing values are skipped.
+    """
+
+    def __init__(self, block_size=STATS_BLOCK):
+        self.block_size = block_size
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self._block = None
+        self._pending = []
+
+    def update(self, values, positions):
+        values = np.asarray(values, dtype="float64")
+        if not len(values):
+            # e.g. a chunk (or column) whose rows were all dropped by an earlier filter
+            return self
+        blocks = np.asarray(positions) // self.block_size
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(blocks)) + 1))
+        for start, end in zip(starts, np.append(starts[1:], len(values))):
+            if blocks[start] != self._block:
+                self._merge_pending()
+                self._block = blocks[start]
+            self._pending.append(values[start:end])
+        return self
+
+    def _merge_pending(self):
+        if not self._pending:
+            return
+        block = np.concatenate(self._pending)
+        self._pending = []
+        block = block[~np.isnan(block)]
+        if not len(block):
+            return
+        block_mean = block.mean()
+        block_m2 = ((block - block_mean) ** 2).sum()
+        count = self.count + len(block)
+        delta = block_mean - self.mean
+        self.mean += delta * len(block) / count
+        self.m2 += block_m2 + delta ** 2 * self.count * len(block) / count
+        self.count = count
+
+    def finish(self):
+        """
+        Return ``(mean, std)``; NaN when there are too few values.
+        """
+        self._merge_pending()
+        mean = self.mean if self.count else np.nan
+        std = np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+        return mean, std
+
+
+def zscore_keep(values, mean, std, threshold=3):
+    """
+    Boolean mask of the values within ``threshold`` standard deviations (missing values are dropped).
+    """
+    return np.abs((np.asarray(values, dtype="float64") - mean) / std) <= threshold
+
 
 # Removing outliers for all columns
-def remove_outliers_zscore(data, threshold=3):
+def remove_outliers_zscore(data, threshold=3, columns=None, block_size=STATS_BLOCK):
     """
     Remove outliers from all numerical columns using the Z-score method.
+
+    Columns are filtered in turn, each with the statistics of the rows that
+    survived the previous columns.
     """
-    for col in numerical_columns:
-        mean_col = data[col].mean()
-        std_col = data[col].std()
-        z_scores = (data[col] - mean_col) / std_col
-        data = data[np.abs(z_scores) <= threshold]
+    positions = np.arange(len(data))
+    for col in numerical_columns(data) if columns is None else columns:
+        values = data[col].to_numpy()
+        mean_col, std_col = BlockedMoments(block_size).update(values, positions).finish()
+        keep = zscore_keep(values, mean_col, std_col, threshold)
+        data = data[keep]
+        positions = positions[keep]
     return data
 
-df_cleaned = remove_outliers_zscore(df)
-print(f"\nDataset cleaned. Remaining rows: {len(df_cleaned)}")
 
-# Correlation analysis
-correlation_matrix = df_cleaned.corr()
-print("\nCorrelation Matrix:")
-print(correlation_matrix)
+def clean_dataset(df, threshold=3):
+    """
+    Fill missing values and drop z-score outliers, without the exploratory output of ``main``.
+    """
+    df = fill_missing(df)
+    with span("remove_outliers", "clean", rows=len(df)):
+        return remove_outliers_zscore(df, threshold)
+
+
+# Streaming (out-of-core) cleaning
+def iter_filled_chunks(chunks, max_lookahead=MAX_LOOKAHEAD):
+    """
+    Forward- then backward-fill a stream of chunks exactly like ``df.ffill().bfill()``.
+
+    The last filled row carries the forward fill across chunk boundaries. After a
+    forward fill only leading gaps remain, so rows are held back only until every
+    column has produced its first value; more than ``max_lookahead`` such rows
+    raises ``ValueError``. Yields ``(chunk, first_row_position)``.
+    """
+    last = None
+    pending = []
+    position = 0
+    for chunk in chunks:
+        if last is not None:
+            chunk = apply_schema(chunk.ffill().fillna(last), floats=False)
+        else:
+            # Held-back chunks are forward-filled together, so fills cross their boundaries too
+            pending.append(chunk)
+            head = pd.concat(pending, ignore_index=True).ffill()
+            if head.notna().any().all():
+                chunk, pending = apply_schema(head.bfill(), floats=False), []
+            elif len(head) > max_lookahead:
+                raise ValueError(f"Leading gap longer than the {max_lookahead}-row lookahead")
+            else:
+                continue
+        if len(chunk):
+            last = chunk.iloc[-1]
+        yield chunk.set_axis(pd.RangeIndex(position, position + len(chunk))), position
+        position += len(chunk)
+    if pending:
+        chunk = apply_schema(pd.concat(pending, ignore_index=True).ffill().bfill(), floats=False)
+        yield chunk.set_axis(pd.RangeIndex(position, position + len(chunk))), position
+
+
+def _filter_chunk(chunk, positions, filters, threshold):
+    for col, mean_col, std_col in filters:
+        keep = zscore_keep(chunk[col].to_numpy(), mean_col, std_col, threshold)
+        chunk = chunk[keep]
+        positions = positions[keep]
+    return chunk, positions
+
+
+def clean_dataset_streaming(input_path=RAW_DATASET, output_path=CLEANED_DATASET, fmt=None, threshold=3,
+                            chunk_size=CHUNK_SIZE, max_lookahead=MAX_LOOKAHEAD, block_size=STATS_BLOCK):
+    """
+    Produce the output of ``clean_dataset`` from ordered chunks of the raw file.
+
+    Each column's z-score statistics depend on the rows kept by the previous
+    columns, so the file is streamed once per numerical column to accumulate
+    them and once more to write the surviving rows. Memory is bounded by the
+    chunk size (plus the lookahead for leading gaps). Returns the path written.
+    """
+    def filled_chunks(columns=None):
+        return iter_filled_chunks(iter_dataset_chunks(input_path, chunk_size, columns, compact=False), max_lookahead)
+
+    first = next(iter_dataset_chunks(input_path, chunk_size, compact=False))
+    columns = list(numerical_columns(first))
+    filters = []
+    with span("remove_outliers", "clean") as timing:
+        for index, col in enumerate(columns):
+            # Filling is per column, so the statistics passes only read the columns filtered so far
+            moments = BlockedMoments(block_size)
+            for chunk, start in filled_chunks(columns[:index + 1]):
+                chunk, positions = _filter_chunk(chunk, np.arange(start, start + len(chunk)), filters, threshold)
+                moments.update(chunk[col].to_numpy(), positions)
+            filters.append((col, *moments.finish()))
+
+        with DatasetWriter(output_path, fmt, empty=first.iloc[:0]) as writer:
+            for chunk, start in filled_chunks():
+                chunk, _ = _filter_chunk(chunk, np.arange(start, start + len(chunk)), filters, threshold)
+                writer.write(chunk)
+        timing.set_rows(writer.rows)
+    return writer.path
+
+
+def main(input_path=RAW_DATASET, output_path=CLEANED_DATASET, fmt=None, show_plots=True, chunk_size=CHUNK_SIZE):
+    """
+    Analyse, clean and save the raw dataset; returns the path written.
+
+    The dataset is cleaned at full precision; consumers apply the compact schema when loading.
+    """
+    df = read_dataset(input_path, compact=False)
+
+    # Summary statistics for an overview
+    print("\nDetailed Summary Statistics:")
+    print(df.describe(include='all'))
+
+    # Check for missing values
+    print("\nMissing Values Check:")
+    print(df.isnull().sum())
+    df = fill_missing(df)
+
+    print("\nHomogeneity Check for Numerical Columns (Levene's Test):")
+    print(homogeneity_check(df))
+
+    print("\nAdvanced Statistical Metrics:")
+    print_distribution_metrics(df)
+
+    if show_plots:
+        plot_distributions(df)
+
+    print("\nOutlier Detection Using Z-Score:")
+    for col in numerical_columns(df):
+        outliers = detect_outliers_zscore(df, col)
+        print(f"Outliers in {col}: {len(outliers)}")
+
+    df_cleaned = clean_dataset(df)
+    print(f"\nDataset cleaned. Remaining rows: {len(df_cleaned)}")
+
+    # Correlation analysis
+    with span("correlation", "analysis", rows=len(df_cleaned)):
+        correlation_matrix = compute_correlation(df_cleaned, chunk_size=chunk_size)
+    print("\nCorrelation Matrix:")
+    print(correlation_matrix)
+
+    # Heatmap for correlations
+    if show_plots:
+        plt.figure(figsize=(10, 8))
+        sns.heatmap(correlation_matrix, annot=True, fmt=".2f", cmap="coolwarm")
+        plt.title("Correlation Heatmap")
+        plt.show()
+        plt.close()
+
+    # Save the cleaned and analyzed dataset
+    output_path = write_dataset(df_cleaned, output_path, fmt)
+    print(f"\nFully cleaned and analyzed dataset saved as '{output_path}'.")
+    return output_path
 
-# Heatmap for correlations
-plt.figure(figsize=(10, 8))
-sns.heatmap(correlation_matrix, annot=True, fmt=".2f", cmap="coolwarm")
-plt.title("Correlation Heatmap")
-plt.show()
 
-# Save the cleaned and analyzed dataset
-df_cleaned.to_csv("fully_cleaned_global_warming_sim_dataset.csv", index=False)
-print("\nFully cleaned and analyzed dataset saved as 'fully_cleaned_global_warming_sim_dataset.csv'.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.figure import Figure
+
+from storage import write_dataset
+
+COMPONENTS = ("trend", "seasonal", "resid")
+
+
+def moving_average_trend(values, period):
+    """
+    Centred moving average along axis 0 of a 2-D array, one pass via cumulative sums.
+
+    Uses the same filter as ``seasonal_decompose`` (a 2 x period average for even
+    periods); the first and last ``period // 2`` rows are NaN.
+    """
+    n = values.shape[0]
+    half = period // 2
+    trend = np.full(values.shape, np.nan)
+    if n <= 2 * half:
+        return trend
+    csum = np.zeros((n + 1,) + values.shape[1:])
+    np.cumsum(values, axis=0, out=csum[1:])
+    centre = np.arange(half, n - half)
+    if period % 2:
+        window_sum = csum[centre + half + 1] - csum[centre - half]
+    else:
+        window_sum = csum[centre + half + 1] - csum[centre - half] \
+            - 0.5 * values[centre - half] - 0.5 * values[centre + half]
+    trend[half:n - half] = window_sum / period
+    return trend
+
+
+def seasonal_indices(detrended, period):
+    """
+    Mean detrended value per phase of the cycle, centred on zero, for every column.
+    """
+    n = detrended.shape[0]
+    cycles = int(np.ceil(n / period))
+    padded = np.full((cycles * period,) + detrended.shape[1:], np.nan)
+    padded[:n] = detrended
+    indices = np.nanmean(padded.reshape((cycles, period) + detrended.shape[1:]), axis=0)
+    return indices - indices.mean(axis=0)
+
+
+def decompose_array(values, period=12):
+    """
+    Additive decomposition of every column of a 2-D array at once.
+
+    Returns a dict with ``trend``, ``seasonal`` and ``resid`` arrays shaped like ``values``.
+    """
+    values = np.asarray(values, dtype="float64")
+    trend = moving_average_trend(values, period)
+    detrended = values - trend
+    indices = seasonal_indices(detrended, period)
+    seasonal = np.resize(indices, values.shape) if values.ndim == 1 else \
+        np.tile(indices, (int(np.ceil(values.shape[0] / period)), 1))[:values.shape[0]]
+    return {"trend": trend, "seasonal": seasonal, "resid": detrended - seasonal}
+
+
+def _stl_column(values, period):
+    from statsmodels.tsa.seasonal import STL
+    result = STL(values, period=period).fit()
+    return result.trend, result.seasonal, result.resid
+
+
+def decompose_stl(values, period=12, workers=None):
+    """
+    STL decomposition of every column, one column per worker process.
+    """
+    values = np.asarray(values, dtype="float64")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_stl_column, values.T, [period] * values.shape[1]))
+    return {name: np.column_stack([result[i] for result in results]) for i, name in enumerate(COMPONENTS)}
+
+
+def _ordered_groups(data, group_col):
+    sort_cols = [col for col in (group_col, "Year", "Month") if col is not None and col in data.columns]
+    data = data.sort_values(sort_cols, kind="stable") if sort_cols else data
+    if group_col is None:
+        return data, [(None, data)]
+    return data, list(data.groupby(group_col, sort=False))
+
+
+def batched_decompose(data, columns, period=12, group_col=None, method="moving_average", workers=None):
+    """
+    Decompose ``columns`` for every group of ``group_col`` (e.g. region).
+
+    When all groups have the same length they are stacked side by side so the
+    whole dataset is decomposed as a single 2-D array. Returns a DataFrame with
+    ``{column}_trend``, ``{column}_seasonal`` and ``{column}_resid`` columns
+    alongside the time (and group) keys.
+    """
+    data, groups = _ordered_groups(data, group_col)
+    lengths = {len(group) for _, group in groups}
+    decompose = decompose_array if method == "moving_average" else \
+        (lambda values, period: decompose_stl(values, period, workers))
+
+    if len(lengths) == 1:
+        # (time, group * variable) matrix, decomposed in one call
+        stacked = np.hstack([group[columns].to_numpy(dtype="float64") for _, group in groups])
+        components = {name: np.vstack(np.hsplit(array, len(groups)))
+                      for name, array in decompose(stacked, period).items()}
+    else:
+        parts = [decompose(group[columns].to_numpy(dtype="float64"), period) for _, group in groups]
+        components = {name: np.vstack([part[name] for part in parts]) for name in COMPONENTS}
+
+    keys = [col for col in (group_col, "Year", "Month") if col is not None and col in data.columns]
+    result = data[keys].reset_index(drop=True)
+    for i, col in enumerate(columns):
+        for name in COMPONENTS:
+            result[f"{col}_{name}"] = components[name][:, i].astype("float32")
+    return result
+
+
+def plot_components(observed, components, column, title, output_path):
+    """
+    Save a four-panel observed/trend/seasonal/residual figure.
+    """
+    fig = Figure(figsize=(10, 8))
+    axes = fig.subplots(4, 1, sharex=True)
+    series = [("Observed", observed)] + [(name.capitalize(), components[f"{column}_{name}"]) for name in COMPONENTS]
+    for ax, (label, values) in zip(axes, series):
+        if label == "Resid":
+            ax.plot(np.asarray(values), marker="o", linestyle="none", markersize=2)
+            ax.axhline(0, color="black", linewidth=0.8)
+        else:
+            ax.plot(np.asarray(values))
+        ax.set_ylabel(label)
+    fig.suptitle(title)
+    fig.savefig(output_path)
+
+
+def write_decomposition(data, columns, output_dir="report/decomposition",
+                        components_path="report/decomposition_components.csv",
+                        period=12, group_col=None, method="moving_average", workers=None):
+    """
+    Decompose all columns, save the components as a dataset and one figure per column (and group).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    components = batched_decompose(data, columns, period, group_col, method, workers)
+    saved_path = write_dataset(components, components_path)
+    print(f"Saved: {saved_path}")
+
+    data, groups = _ordered_groups(data, group_col)
+    offset = 0
+    for group, group_data in groups:
+        group_components = components.iloc[offset:offset + len(group_data)]
+        offset += len(group_data)
+        prefix = "" if group is None else f"{group_col}_{group}_"
+        for col in columns:
+            output_path = os.path.join(output_dir, f"{prefix}{col}.png")
+            plot_components(group_data[col], group_components, col, f"{prefix}{col}".replace("_", " "), output_path)
+    print(f"Saved: {len(groups) * len(columns)} decomposition figures in {output_dir}")
+    return components
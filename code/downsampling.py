@@ -0,0 +1,116 @@
+import numpy as np
+import plotly.graph_objects as go
+
+# Charts are downsampled to a few points per horizontal pixel of the viewport
+DEFAULT_VIEWPORT_WIDTH = 1200
+POINTS_PER_PIXEL = 2
+# Series longer than this are drawn with WebGL traces
+WEBGL_THRESHOLD = 5000
+
+
+def target_points(width=DEFAULT_VIEWPORT_WIDTH):
+    return max(3, int(width * POINTS_PER_PIXEL))
+
+
+def _as_float(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        values = values.astype("datetime64[ns]").astype("int64")
+    return values.astype("float64")
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Select ``n_out`` indices with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept; from every bucket in between the
+    point forming the largest triangle with the previous pick and the mean of
+    the next bucket is chosen, which preserves peaks and the overall shape.
+    """
+    x = _as_float(x)
+    y = np.asarray(y, dtype="float64")
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], max(edges[i + 1], edges[i] + 1)
+        if i + 2 < len(edges):
+            next_start, next_stop = edges[i + 1], max(edges[i + 2], edges[i + 1] + 1)
+        else:
+            next_start, next_stop = n - 1, n
+        mean_x = x[next_start:next_stop].mean()
+        mean_y = y[next_start:next_stop].mean()
+        areas = np.abs(
+            (x[previous] - mean_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (mean_y - y[previous])
+        )
+        previous = start + int(np.nanargmax(areas)) if np.isfinite(areas).any() else start
+        selected[i + 1] = previous
+    return selected
+
+
+def minmax_indices(y, n_out):
+    """
+    Keep the minimum and maximum of each of ``n_out // 2`` equal buckets.
+    """
+    y = np.asarray(y, dtype="float64")
+    n = len(y)
+    n_buckets = max(1, n_out // 2)
+    if n_out >= n:
+        return np.arange(n)
+
+    bucket = int(np.ceil(n / n_buckets))
+    padded = np.full(bucket * n_buckets, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(n_buckets, bucket)
+    valid = ~np.all(np.isnan(padded), axis=1)
+    offsets = np.arange(n_buckets)[valid] * bucket
+    lows = offsets + np.nanargmin(padded[valid], axis=1)
+    highs = offsets + np.nanargmax(padded[valid], axis=1)
+    return np.unique(np.concatenate([[0, n - 1], lows, highs]))
+
+
+def downsample_indices(x, y, width=DEFAULT_VIEWPORT_WIDTH, method="lttb"):
+    n_out = target_points(width)
+    if method == "minmax":
+        return minmax_indices(y, n_out)
+    return lttb_indices(x, y, n_out)
+
+
+def downsample_frame(df, x, y_columns, width=DEFAULT_VIEWPORT_WIDTH, method="lttb"):
+    """
+    Return the rows of ``df`` needed to draw each of ``y_columns`` against ``x``.
+
+    Indices are picked per column and merged, so every line keeps its shape.
+    """
+    if isinstance(y_columns, str):
+        y_columns = [y_columns]
+    if len(df) <= target_points(width):
+        return df
+    indices = np.unique(np.concatenate([
+        downsample_indices(df[x].to_numpy(), df[col].to_numpy(), width, method) for col in y_columns
+    ]))
+    return df.iloc[indices]
+
+
+def render_mode(n_points):
+    return "webgl" if n_points > WEBGL_THRESHOLD else "svg"
+
+
+def line_trace(x, y, name, width=DEFAULT_VIEWPORT_WIDTH, method="lttb", **kwargs):
+    """
+    Build a Plotly line trace with a bounded number of points.
+
+    Long series switch to ``Scattergl`` so that panning and zooming stay smooth.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    indices = downsample_indices(x, y, width, method)
+    trace_type = go.Scattergl if len(y) > WEBGL_THRESHOLD else go.Scatter
+    return trace_type(x=x[indices], y=y[indices], mode="lines", name=name, **kwargs)
@@ -0,0 +1,76 @@
+import pickle
+import threading
+from collections import OrderedDict
+
+
+class FigureCache:
+    """
+    Size-bounded LRU cache of serialised figure specs and derived aggregates.
+
+    Entries are keyed by (name, dataset fingerprint, params) and stored as bytes
+    or strings so that a single instance can be shared by every app session.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(name, fingerprint, params=None):
+        return (name, fingerprint, tuple(sorted((params or {}).items())))
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, key, value):
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= len(self._entries.pop(key))
+            self._entries[key] = value
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+
+    def get_or_build(self, name, fingerprint, build, params=None):
+        """
+        Return the cached serialised value, calling ``build()`` on a miss.
+
+        ``build`` must return ``bytes`` or ``str``.
+        """
+        key = self.make_key(name, fingerprint, params)
+        value = self.get(key)
+        if value is None:
+            value = build()
+            self.put(key, value)
+        return value
+
+    def get_or_build_aggregate(self, name, fingerprint, build, params=None):
+        """
+        Cache a derived aggregate (e.g. a DataFrame) in pickled form.
+        """
+        return pickle.loads(self.get_or_build(name, fingerprint, lambda: pickle.dumps(build()), params))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes
+            }
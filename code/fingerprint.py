@@ -0,0 +1,85 @@
+import ast
+import hashlib
+import inspect
+import json
+import os
+
+import pandas as pd
+
+
+# Content hashing helpers shared by the report builder and other caches
+def file_digest(path, chunk_size=1 << 20):
+    """
+    Return the SHA-256 hex digest of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_digest(func):
+    """
+    Return the SHA-256 hex digest of a function's source code.
+    """
+    return hashlib.sha256(inspect.getsource(func).encode("utf-8")).hexdigest()
+
+
+def local_modules(script_path, seen=None):
+    """
+    Collect a script and the modules it imports from its own directory, recursively.
+    """
+    seen = set() if seen is None else seen
+    if script_path in seen:
+        return seen
+    seen.add(script_path)
+    with open(script_path) as handle:
+        tree = ast.parse(handle.read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            candidate = os.path.join(os.path.dirname(script_path), f"{name.split('.')[0]}.py")
+            if os.path.exists(candidate):
+                local_modules(candidate, seen)
+    return seen
+
+
+def module_digest(func):
+    """
+    Hash the module defining ``func`` together with every local module it imports.
+    """
+    script_path = os.path.abspath(inspect.getsourcefile(func))
+    return combine_digests([
+        (os.path.basename(path), file_digest(path)) for path in sorted(local_modules(script_path))
+    ])
+
+
+def combine_digests(*parts):
+    """
+    Hash strings, bytes and JSON-serialisable values together into one hex digest.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, bytes):
+            data = part
+        elif isinstance(part, str):
+            data = part.encode("utf-8")
+        else:
+            data = json.dumps(part, sort_keys=True, default=str).encode("utf-8")
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def frame_fingerprint(df):
+    """
+    Return a hex digest identifying a DataFrame's columns, dtypes and values.
+    """
+    row_hashes = pd.util.hash_pandas_object(df, index=True).values
+    return combine_digests(list(map(str, df.columns)), list(map(str, df.dtypes)), row_hashes.tobytes())
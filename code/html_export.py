@@ -0,0 +1,132 @@
+import base64
+import html
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+from plotly.utils import PlotlyJSONEncoder
+
+# Shared plotly.js asset written once next to the HTML files that use it
+PLOTLY_JS_NAME = "plotly.min.js"
+# Arrays shorter than this are left as plain JSON lists
+MIN_TYPED_LENGTH = 16
+
+_HTML_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<script src="{script}"></script>
+</head>
+<body style="margin:0">
+<div id="figure" style="width:100%;height:100vh;"></div>
+<script>
+Plotly.newPlot("figure", {data}, {layout}, {{"responsive": true}});
+</script>
+</body>
+</html>
+"""
+
+
+def supports_typed_arrays():
+    """
+    plotly.js understands base64 typed-array specs from version 2.28 onwards.
+    """
+    major, minor = (int(part) for part in get_plotlyjs_version().split(".")[:2])
+    return (major, minor) >= (2, 28)
+
+
+def ensure_plotly_js(directory):
+    """
+    Write the bundled plotly.js into ``directory`` unless an identical copy exists.
+    """
+    path = os.path.join(directory, PLOTLY_JS_NAME)
+    bundle = get_plotlyjs()
+    if not os.path.exists(path) or os.path.getsize(path) != len(bundle.encode("utf-8")):
+        # Write-then-rename so charts rendered in parallel never see a partial file
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            handle.write(bundle)
+        os.replace(temporary, path)
+    return path
+
+
+def _typed_dtype(values):
+    """
+    Pick the smallest plotly.js typed-array dtype that represents ``values``.
+    """
+    if values.dtype.kind == "b":
+        return "u1"
+    if values.dtype.kind in "iu":
+        low, high = values.min(), values.max()
+        for dtype in ("i1", "u1", "i2", "u2", "i4", "u4"):
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return dtype
+        return "f8"
+    with np.errstate(over="ignore"):
+        as_float32 = values.astype("float32")
+    return "f4" if np.allclose(as_float32, values, rtol=1e-6, atol=0, equal_nan=True) else "f8"
+
+
+def encode_array(values):
+    """
+    Encode a numeric array as a plotly.js ``{dtype, bdata}`` typed-array spec.
+
+    Non-numeric and short arrays are returned unchanged.
+    """
+    if isinstance(values, (pd.Series, pd.Index)):
+        values = values.to_numpy()
+    if isinstance(values, (list, tuple)):
+        try:
+            values = np.asarray(values)
+        except ValueError:
+            return values
+    if not isinstance(values, np.ndarray) or values.ndim != 1 or len(values) < MIN_TYPED_LENGTH:
+        return values
+    if values.dtype.kind not in "biuf":
+        return values
+    dtype = _typed_dtype(values)
+    data = values.astype(np.dtype(dtype).newbyteorder("<")).tobytes()
+    return {"dtype": dtype, "bdata": base64.b64encode(data).decode("ascii")}
+
+
+def _encode_arrays(node):
+    if isinstance(node, dict):
+        return {key: _encode_arrays(value) for key, value in node.items()}
+    if isinstance(node, (list, tuple, np.ndarray, pd.Series, pd.Index)):
+        encoded = encode_array(node)
+        if isinstance(encoded, dict):
+            return encoded
+        # Not encodable as a whole (short, nested or mixed-type): keep the original
+        # values, since the array ``encode_array`` built may have coerced them
+        if isinstance(node, (list, tuple)):
+            return [_encode_arrays(value) for value in node]
+    return node
+
+
+def write_compact_html(fig, output_path):
+    """
+    Write ``fig`` as a small HTML file that loads a shared local plotly.js.
+
+    Numeric data arrays are embedded as base64 typed arrays instead of JSON
+    number lists when the bundled plotly.js supports it.
+    """
+    directory = os.path.dirname(output_path) or "."
+    ensure_plotly_js(directory)
+    fig_dict = fig.to_plotly_json()
+    data = fig_dict["data"]
+    if supports_typed_arrays():
+        data = [_encode_arrays(trace) for trace in data]
+    title = fig.layout.title.text or os.path.splitext(os.path.basename(output_path))[0]
+    page = _HTML_TEMPLATE.format(
+        title=html.escape(title),
+        script=PLOTLY_JS_NAME,
+        data=json.dumps(data, cls=PlotlyJSONEncoder),
+        layout=json.dumps(fig_dict["layout"], cls=PlotlyJSONEncoder)
+    )
+    with open(output_path, "w", encoding="utf-8") as handle:
+        handle.write(page)
+    return output_path
@@ -0,0 +1,199 @@
+import atexit
+import collections
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+# Set GWF_TRACE=1 to record spans; traces are written to GWF_TRACE_DIR on exit
+TRACE_ENV = "GWF_TRACE"
+TRACE_DIR_ENV = "GWF_TRACE_DIR"
+DEFAULT_TRACE_DIR = "report/traces"
+ENABLED = os.environ.get(TRACE_ENV, "").lower() not in ("", "0", "false", "no")
+# Only the most recent spans are kept, so long-running processes (the app) stay bounded
+MAX_EVENTS_ENV = "GWF_TRACE_MAX_EVENTS"
+MAX_EVENTS = int(os.environ.get(MAX_EVENTS_ENV, 10_000))
+
+_events = collections.deque(maxlen=MAX_EVENTS)
+_lock = threading.Lock()
+_local = threading.local()
+_origin_ns = time.perf_counter_ns()
+
+
+class _NullSpan:
+    """
+    Shared do-nothing span returned while instrumentation is off.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set_rows(self, rows):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """
+    Records wall time, CPU time, peak traced memory and a row count for one block.
+
+    Peaks are tracked per span: the tracemalloc peak is reset on entry and the
+    span's peak is folded into its parent's on exit, so nested spans report
+    their own high-water mark without hiding it from the enclosing span.
+    """
+
+    def __init__(self, name, category="stage", rows=None):
+        self.name = name
+        self.category = category
+        self.rows = rows
+        self.peak = 0
+
+    def set_rows(self, rows):
+        self.rows = int(rows)
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1].peak = max(stack[-1].peak, peak)
+        tracemalloc.reset_peak()
+        stack.append(self)
+        self._start_memory = current
+        self._start_cpu = time.process_time_ns()
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        cpu = time.process_time_ns() - self._start_cpu
+        self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+        stack = _local.stack
+        stack.pop()
+        if stack:
+            stack[-1].peak = max(stack[-1].peak, self.peak)
+        args = {
+            "cpu_ms": round(cpu / 1e6, 3),
+            "peak_mb": round((self.peak - self._start_memory) / 2 ** 20, 3)
+        }
+        if self.rows is not None:
+            args["rows"] = self.rows
+        event = {
+            "name": self.name, "cat": self.category, "ph": "X",
+            "ts": (self._start - _origin_ns) / 1e3, "dur": (end - self._start) / 1e3,
+            "pid": os.getpid(), "tid": threading.get_ident(), "args": args
+        }
+        with _lock:
+            _events.append(event)
+        return False
+
+
+def span(name, category="stage", rows=None):
+    """
+    Context manager timing a block; a shared no-op when instrumentation is off.
+    """
+    if not ENABLED:
+        return _NULL_SPAN
+    return Span(name, category, rows)
+
+
+def traced(name=None, category="stage"):
+    """
+    Decorator form of ``span``; leaves the function untouched when instrumentation is off.
+    """
+    def decorate(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(name or func.__name__, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def events():
+    with _lock:
+        return list(_events)
+
+
+def collect_events():
+    """
+    Remove and return the spans recorded (or merged) by this process, for a
+    worker to hand to its parent. Returns None when instrumentation is off.
+    """
+    if not ENABLED:
+        return None
+    with _lock:
+        recorded = list(_events)
+        _events.clear()
+    return {"origin_ns": _origin_ns, "events": recorded}
+
+
+def merge_events(collected):
+    """
+    Add spans returned by ``collect_events`` in another process, aligned to this process's clock.
+    """
+    if not collected:
+        return
+    offset = (collected["origin_ns"] - _origin_ns) / 1e3
+    with _lock:
+        _events.extend(dict(event, ts=event["ts"] + offset) for event in collected["events"])
+
+
+def summary_table(recorded=None):
+    """
+    Per-span totals (calls, wall, CPU, max peak memory, rows) as a text table.
+    """
+    totals = {}
+    for event in events() if recorded is None else recorded:
+        entry = totals.setdefault((event["cat"], event["name"]), [0, 0.0, 0.0, 0.0, None])
+        entry[0] += 1
+        entry[1] += event["dur"] / 1e3
+        entry[2] += event["args"]["cpu_ms"]
+        entry[3] = max(entry[3], event["args"]["peak_mb"])
+        if "rows" in event["args"]:
+            entry[4] = (entry[4] or 0) + event["args"]["rows"]
+    lines = [f"{'span':44s} {'calls':>5s} {'wall ms':>10s} {'cpu ms':>10s} {'peak MB':>9s} {'rows':>10s}"]
+    for (category, name), (calls, wall, cpu, peak, rows) in sorted(totals.items(), key=lambda item: -item[1][1]):
+        rows = "" if rows is None else f"{rows:d}"
+        lines.append(f"{category + ':' + name:44.44s} {calls:5d} {wall:10.1f} {cpu:10.1f} {peak:9.1f} {rows:>10s}")
+    return "\n".join(lines)
+
+
+def write_trace(path=None):
+    """
+    Write the recorded spans as Chrome trace-event JSON (chrome://tracing, Perfetto).
+    """
+    if path is None:
+        script = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+        path = os.path.join(os.environ.get(TRACE_DIR_ENV, DEFAULT_TRACE_DIR), f"trace_{script}_{os.getpid()}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump({"traceEvents": events(), "displayTimeUnit": "ms"}, handle)
+    return path
+
+
+def _report_at_exit():
+    if not _events:
+        return
+    print(summary_table())
+    print(f"Saved: {write_trace()}")
+
+
+if ENABLED:
+    tracemalloc.start()
+    atexit.register(_report_at_exit)
+    # A forked worker starts without the parent's spans; it returns its own via collect_events()
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_events.clear)
@@ -0,0 +1,64 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import instrumentation
+from shared_data import DatasetDescriptor, attach_dataset, publish_dataset, shareable
+
+
+def init_render_worker():
+    """
+    Force the non-interactive Agg backend in every render process.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def run_task(func, args, kwargs):
+    """
+    Worker side of a pooled task: attach shared datasets, call ``func`` and
+    return its result together with the spans recorded meanwhile.
+    """
+    args = [attach_dataset(value) if isinstance(value, DatasetDescriptor) else value for value in args]
+    kwargs = {key: attach_dataset(value) if isinstance(value, DatasetDescriptor) else value
+              for key, value in kwargs.items()}
+    return func(*args, **kwargs), instrumentation.collect_events()
+
+
+def task_result(future):
+    """
+    Result of a ``run_task`` future; its spans are merged into this process's trace.
+    """
+    result, collected = future.result()
+    instrumentation.merge_events(collected)
+    return result
+
+
+def run_tasks(tasks, workers=1, shared=()):
+    """
+    Run ``(function, args, kwargs)`` tasks in order, or in a process pool when ``workers > 1``.
+
+    In a pool, the DataFrames in ``shared`` are published once to shared memory;
+    task arguments that are one of those frames reach the workers as a descriptor
+    and are re-attached zero-copy instead of being pickled for every task.
+    Returns the results in task order.
+    """
+    if workers is None or workers > 1:
+        published = {}
+        try:
+            for frame in shared:
+                if id(frame) not in published and shareable(frame):
+                    published[id(frame)] = publish_dataset(frame)
+
+            def swap(value):
+                return published[id(value)].descriptor if id(value) in published else value
+
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_render_worker) as executor:
+                futures = [
+                    executor.submit(run_task, func, [swap(value) for value in args],
+                                    {key: swap(value) for key, value in kwargs.items()})
+                    for func, args, kwargs in tasks
+                ]
+                return [task_result(future) for future in futures]
+        finally:
+            for dataset in published.values():
+                dataset.close()
+    return [func(*args, **kwargs) for func, args, kwargs in tasks]
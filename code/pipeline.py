@@ -0,0 +1,228 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import instrumentation
+from fingerprint import combine_digests, file_digest, local_modules
+from scenario_model import SCENARIOS
+from storage import dataset_path, default_format, resolve_dataset_path
+
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(CODE_DIR)
+STATE_FILE = ".pipeline_state.json"
+
+RAW_DATASET = "global_warming_sim_dataset.csv"
+CLEANED_DATASET = "fully_cleaned_global_warming_sim_dataset.csv"
+SCENARIO_NAMES = list(SCENARIOS)
+
+
+def pipeline_stages():
+    """
+    Describe the pipeline as a dependency graph.
+
+    ``inputs`` are files resolved at run time (for datasets either the columnar
+    file or the CSV is hashed) and ``outputs`` are the files a stage writes.
+    ``script`` is the module whose code (with its local imports) is fingerprinted
+    and ``run`` the ``cli`` entry point and keyword arguments that execute it.
+    """
+    fmt = default_format()
+    stages = {
+        "generate": {
+            "script": "code/data_generation.py",
+            "deps": [],
+            "inputs": [],
+            "outputs": [dataset_path(RAW_DATASET, fmt)],
+            "params": {"format": fmt},
+            "run": ("generate", {"output_path": RAW_DATASET, "fmt": fmt})
+        },
+        "preprocess": {
+            "script": "code/data_preprocessing.py",
+            "deps": ["generate"],
+            "inputs": [RAW_DATASET],
+            "outputs": [dataset_path(CLEANED_DATASET, fmt)],
+            "params": {"format": fmt},
+            "run": ("preprocess", {"input_path": RAW_DATASET, "output_path": CLEANED_DATASET, "fmt": fmt})
+        },
+        "simulate": {
+            "script": "code/simulation.py",
+            "deps": ["preprocess"],
+            "inputs": [CLEANED_DATASET],
+            "outputs": [f"report/{name}_Temperature_Anomaly.png" for name in SCENARIO_NAMES] + [
+                "report/correlation_matrix_heatmap.png",
+                "report/temperature_anomaly_forecast.png",
+                "report/scenario_comparisons.png",
+                "report/scenario_summary.csv"
+            ],
+            "params": {},
+            "run": ("simulate", {"input_path": CLEANED_DATASET})
+        },
+        "visualize": {
+            "script": "code/visualization.py",
+            "deps": ["preprocess"],
+            "inputs": [CLEANED_DATASET],
+            "outputs": [
+                "report/advanced_correlation_heatmap.png",
+                "report/interactive_3d_scatter.html",
+                "report/time_series_decomposition.png",
+                "report/rolling_average_chart.png",
+                "report/annual_temperature_heatmap.png",
+                "report/interactive_line_chart.html",
+                "report/plotly.min.js",
+                dataset_path("report/decomposition_components.csv", fmt)
+            ],
+            "params": {},
+            "run": ("visualize", {"input_path": CLEANED_DATASET})
+        },
+        "report": {
+            "script": "code/report_builder.py",
+            "deps": ["simulate", "visualize"],
+            "inputs": [CLEANED_DATASET],
+            "outputs": ["report/global_warming_report.pdf"],
+            "params": {},
+            "run": ("report", {"input_path": CLEANED_DATASET})
+        }
+    }
+    # The report embeds the charts written by the simulation and visualization stages
+    for dep in stages["report"]["deps"]:
+        stages["report"]["inputs"] += [path for path in stages[dep]["outputs"] if path.endswith(".png")]
+    return stages
+
+
+def stage_fingerprint(stage):
+    """
+    Hash a stage's input data, its code (including local imports) and parameters.
+    """
+    input_digests = [file_digest(resolve_dataset_path(os.path.join(ROOT_DIR, path))) for path in stage["inputs"]]
+    script = os.path.join(ROOT_DIR, stage["script"])
+    code_digests = [
+        (os.path.relpath(path, ROOT_DIR), file_digest(path)) for path in sorted(local_modules(script))
+    ]
+    return combine_digests(input_digests, code_digests, stage["params"])
+
+
+def _load_state():
+    path = os.path.join(ROOT_DIR, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def _save_state(state):
+    with open(os.path.join(ROOT_DIR, STATE_FILE), "w") as handle:
+        json.dump(state, handle, indent=2, sort_keys=True)
+
+
+def is_up_to_date(stage, recorded):
+    if recorded is None:
+        return False
+    if not all(os.path.exists(os.path.join(ROOT_DIR, path)) for path in stage["outputs"]):
+        return False
+    try:
+        return stage_fingerprint(stage) == recorded
+    except FileNotFoundError:
+        return False
+
+
+def _init_stage_worker():
+    """
+    Stage processes work from the repository root with the non-interactive backend.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    os.chdir(ROOT_DIR)
+
+
+def _run_stage(name, command, options):
+    """
+    Call a ``cli`` entry point in a worker process, capturing what it prints.
+
+    Returns the elapsed time and the spans recorded by the stage (when tracing).
+    """
+    import cli
+    import instrumentation
+    output = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output):
+            getattr(cli, command)(**options)
+    except Exception:
+        raise RuntimeError(f"Stage '{name}' failed:\n{output.getvalue()}{traceback.format_exc()}") from None
+    return time.perf_counter() - start, instrumentation.collect_events()
+
+
+def run_pipeline(targets=None, force=False, workers=2, dry_run=False):
+    """
+    Run the stages needed for ``targets``, skipping those that are up to date.
+
+    A stage is submitted as soon as all of its dependencies have finished, so
+    independent stages (simulation and visualization) run in parallel.
+    Returns a dict mapping stage name to "ran", "skipped" or (dry run) "stale".
+    """
+    stages = pipeline_stages()
+    targets = targets or list(stages)
+
+    # Restrict the graph to the targets and everything they depend on
+    needed = set()
+    todo = list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in stages:
+            raise ValueError(f"Unknown stage '{name}'. Choose from: {', '.join(stages)}")
+        if name not in needed:
+            needed.add(name)
+            todo.extend(stages[name]["deps"])
+
+    state = _load_state()
+    status = {}
+    running = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_stage_worker) as executor:
+        while len(status) < len(needed):
+            ready = [
+                name for name in stages
+                if name in needed and name not in status and name not in running.values()
+                and all(dep in status for dep in stages[name]["deps"])
+            ]
+            for name in ready:
+                stage = stages[name]
+                upstream_stale = any(status[dep] == "stale" for dep in stage["deps"])
+                if not force and not upstream_stale and is_up_to_date(stage, state.get(name)):
+                    status[name] = "skipped"
+                    print(f"[{name}] up to date, skipped")
+                elif dry_run:
+                    status[name] = "stale"
+                    print(f"[{name}] would run")
+                else:
+                    print(f"[{name}] running {stage['script']}")
+                    running[executor.submit(_run_stage, name, *stage["run"])] = name
+            if ready and not running:
+                continue
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                elapsed, collected = future.result()
+                instrumentation.merge_events(collected)
+                state[name] = stage_fingerprint(stages[name])
+                _save_state(state)
+                status[name] = "ran"
+                print(f"[{name}] finished in {elapsed:.1f}s")
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the global warming pipeline, rebuilding only stale stages.")
+    parser.add_argument("targets", nargs="*", help="Stages to bring up to date (default: all).")
+    parser.add_argument("--force", action="store_true", help="Rerun stages even if they are up to date.")
+    parser.add_argument("--workers", type=int, default=2, help="Number of stages to run in parallel.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report which stages are stale.")
+    args = parser.parse_args(argv)
+    run_pipeline(args.targets, force=args.force, workers=args.workers, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from fingerprint import combine_digests, frame_fingerprint
+from schema import model_precision
+
+CACHE_DIR = ".cache"
+HORIZON_YEARS = 50
+TARGET = "Temperature_Anomaly_C"
+
+
+def prophet_frame(data, target=TARGET):
+    """
+    Build Prophet's ``ds``/``y`` frame from the Year (and Month, when present) columns.
+
+    Rows sharing a date (e.g. several regions) are averaged.
+    """
+    month = data["Month"] if "Month" in data.columns else 1
+    ds = pd.to_datetime(pd.DataFrame({"year": data["Year"], "month": month, "day": 1}))
+    history = pd.DataFrame({"ds": ds.to_numpy(), "y": model_precision(data[target]).to_numpy()})
+    history = history.dropna().groupby("ds", as_index=False)["y"].mean()
+    history["y"] = model_precision(history["y"])
+    return history
+
+
+def warm_start_params(model):
+    """
+    Return a fitted model's parameters in the form ``Prophet.fit(init=...)`` expects.
+
+    With sampling the posterior means are used.
+    """
+    params = {}
+    for name in ("k", "m", "sigma_obs"):
+        values = model.params[name]
+        params[name] = float(values[0][0]) if model.mcmc_samples == 0 else float(np.mean(values))
+    for name in ("delta", "beta"):
+        values = model.params[name]
+        params[name] = values[0] if model.mcmc_samples == 0 else np.mean(values, axis=0)
+    return params
+
+
+def fit_prophet(history, mcmc_samples=0, uncertainty_samples=1000, init=None):
+    """
+    Fit Prophet on a ``ds``/``y`` frame.
+
+    ``mcmc_samples=0`` gives the MAP estimate (fast); a positive value runs full
+    sampling. ``uncertainty_samples`` sets the simulated draws behind the
+    forecast intervals (0 disables them). ``init`` warm-starts the optimiser
+    from earlier parameters (see ``warm_start_params``).
+    """
+    from prophet import Prophet
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    model = Prophet(mcmc_samples=mcmc_samples, uncertainty_samples=uncertainty_samples)
+    if init is None:
+        return model.fit(history)
+    try:
+        return model.fit(history, init=init)
+    except (RuntimeError, ValueError):
+        # Parameter shapes changed (e.g. fewer changepoints); fit cold instead
+        model = Prophet(mcmc_samples=mcmc_samples, uncertainty_samples=uncertainty_samples)
+        return model.fit(history)
+
+
+def forecast_years(model, years=HORIZON_YEARS):
+    """
+    Predict the history and ``years`` yearly steps beyond it.
+    """
+    future = model.make_future_dataframe(periods=years, freq="YS")
+    forecast = model.predict(future)
+    columns = [col for col in ("ds", "yhat", "yhat_lower", "yhat_upper") if col in forecast.columns]
+    return forecast[columns]
+
+
+def _state_path(cache_dir, settings_digest):
+    return os.path.join(cache_dir, f"prophet_state_{settings_digest[:16]}.json")
+
+
+def _load_state(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def _warm_start_from_state(state, history):
+    """
+    Return warm-start parameters when ``history`` only extends the previously fitted history.
+    """
+    if state is None or state["rows"] > len(history):
+        return None
+    if frame_fingerprint(history.iloc[:state["rows"]]) != state["fingerprint"]:
+        return None
+    from prophet.serialize import model_from_json
+    return warm_start_params(model_from_json(state["model"]))
+
+
+def load_or_forecast(data, years=HORIZON_YEARS, mcmc_samples=0, uncertainty_samples=1000, cache_dir=CACHE_DIR):
+    """
+    Return the Prophet forecast frame for this dataset, fitting only when it is not cached.
+
+    Forecasts are cached per (dataset, horizon, settings). When the dataset has only
+    grown since the last fit with the same settings, that fit's parameters seed
+    the optimiser instead of starting cold.
+    """
+    history = prophet_frame(data)
+    settings = {"mcmc_samples": mcmc_samples, "uncertainty_samples": uncertainty_samples}
+    settings_digest = combine_digests(settings)
+    version = combine_digests(frame_fingerprint(history), settings, years)
+    path = os.path.join(cache_dir, f"prophet_{version[:16]}.feather")
+    if os.path.exists(path):
+        return pd.read_feather(path)
+
+    state_path = _state_path(cache_dir, settings_digest)
+    init = _warm_start_from_state(_load_state(state_path), history)
+    model = fit_prophet(history, mcmc_samples, uncertainty_samples, init)
+    forecast = forecast_years(model, years)
+
+    from prophet.serialize import model_to_json
+    os.makedirs(cache_dir, exist_ok=True)
+    # Per-process temporary names: app sessions missing the cache together must not share a file
+    partial = f"{path}.{os.getpid()}.tmp"
+    forecast.to_feather(partial)
+    os.replace(partial, path)
+    state = {"rows": len(history), "fingerprint": frame_fingerprint(history), "model": model_to_json(model)}
+    partial = f"{state_path}.{os.getpid()}.tmp"
+    with open(partial, "w", encoding="utf-8") as handle:
+        json.dump(state, handle)
+    os.replace(partial, state_path)
+    return forecast
@@ -0,0 +1,246 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from matplotlib.image import imread
+from matplotlib.backends.backend_pdf import PdfPages
+
+import simulation
+import visualization
+from correlation import load_or_compute_correlation
+from fingerprint import combine_digests, file_digest, module_digest
+from instrumentation import span
+from parallel import init_render_worker, run_task, task_result
+from scenario_model import SCENARIOS
+from storage import read_dataset, resolve_dataset_path
+
+REPORT_DIR = "report"
+MANIFEST_NAME = ".report_manifest.json"
+TABLE_ROWS_PER_PAGE = 40
+# Widest table line (monospace, 9pt) that fits a portrait page
+TABLE_PORTRAIT_CHARS = 95
+
+
+# Figure renderers. Each one runs in a worker process, reads the dataset and
+# writes a single PNG with the same plotting code as the pipeline scripts.
+def render_scenario(dataset_path, output_path, scenario_name):
+    df = read_dataset(dataset_path)
+    predictions = simulation.scenario_predictions(df, {scenario_name: SCENARIOS[scenario_name]})
+    simulation.plot_scenario(df, predictions[scenario_name], scenario_name, output_path)
+
+
+def render_scenario_comparisons(dataset_path, output_path):
+    df = read_dataset(dataset_path)
+    simulation.plot_scenario_comparisons(df, simulation.scenario_predictions(df), output_path)
+
+
+def render_arima_forecast(dataset_path, output_path, forecast_years=simulation.FORECAST_YEARS):
+    df = read_dataset(dataset_path, columns=["Year", "Temperature_Anomaly_C"])
+    years, forecast = simulation.forecast_arima(df, forecast_years)
+    simulation.plot_forecast(df, years, forecast, output_path)
+
+
+def render_correlation_heatmap(dataset_path, output_path):
+    simulation.plot_correlation(load_or_compute_correlation(read_dataset(dataset_path)), output_path)
+
+
+def render_clustered_correlation(dataset_path, output_path):
+    visualization.advanced_correlation_heatmap(read_dataset(dataset_path), output_path)
+
+
+def render_decomposition(dataset_path, output_path, column="Temperature_Anomaly_C"):
+    df = read_dataset(dataset_path, columns=[column])
+    visualization.time_series_decomposition(df, column, output_path)
+
+
+def render_rolling_average(dataset_path, output_path, column="Temperature_Anomaly_C", window=12):
+    df = read_dataset(dataset_path, columns=["Year", column])
+    visualization.line_chart_with_rolling_averages(df, column, window, output_path)
+
+
+def render_annual_heatmap(dataset_path, output_path, temp_col="Temperature_Anomaly_C"):
+    # The full dataset, so the cached aggregate cube of the visualization script is reused
+    visualization.annual_temperature_heatmap(read_dataset(dataset_path), temp_col=temp_col, output_path=output_path)
+
+
+def report_figures():
+    """
+    List the figures in report order as (title, file name, renderer, params, producer script).
+    """
+    figures = [
+        ("Correlation Matrix", "correlation_matrix_heatmap.png", render_correlation_heatmap, {}, "code/simulation.py"),
+        ("Clustered Correlation", "advanced_correlation_heatmap.png", render_clustered_correlation, {}, "code/visualization.py"),
+        ("Time Series Decomposition", "time_series_decomposition.png", render_decomposition, {}, "code/visualization.py"),
+        ("Rolling Average", "rolling_average_chart.png", render_rolling_average, {}, "code/visualization.py"),
+        ("Annual Temperature Anomalies", "annual_temperature_heatmap.png", render_annual_heatmap, {}, "code/visualization.py"),
+        ("ARIMA Forecast", "temperature_anomaly_forecast.png", render_arima_forecast, {}, "code/simulation.py"),
+        ("Scenario Comparisons", "scenario_comparisons.png", render_scenario_comparisons, {}, "code/simulation.py"),
+    ]
+    for scenario_name in SCENARIOS:
+        figures.append((
+            f"Scenario: {scenario_name.replace('_', ' ')}",
+            f"{scenario_name}_Temperature_Anomaly.png",
+            render_scenario,
+            {"scenario_name": scenario_name},
+            "code/simulation.py"
+        ))
+    return figures
+
+
+def _load_manifest(report_dir):
+    path = os.path.join(report_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def _save_manifest(report_dir, manifest):
+    path = os.path.join(report_dir, MANIFEST_NAME)
+    with open(path, "w") as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+
+
+def _is_fresh(image_path, fingerprint, manifest, dataset_path, producer):
+    """
+    Decide whether an existing image can be reused instead of re-rendered.
+
+    Images recorded in the manifest are reused when their fingerprint matches.
+    Images written by the pipeline scripts carry no manifest entry, so they are
+    adopted when newer than both the dataset and the script that produced them.
+    """
+    if not os.path.exists(image_path):
+        return False
+    name = os.path.basename(image_path)
+    if name in manifest:
+        return manifest[name] == fingerprint
+    image_mtime = os.path.getmtime(image_path)
+    return image_mtime >= os.path.getmtime(dataset_path) and \
+        os.path.exists(producer) and image_mtime >= os.path.getmtime(producer)
+
+
+def _image_page(pdf, title, image_path):
+    fig = Figure(figsize=(11.69, 8.27))
+    ax = fig.add_axes([0.03, 0.03, 0.94, 0.88])
+    ax.imshow(imread(image_path))
+    ax.axis("off")
+    fig.suptitle(title, fontsize=16)
+    pdf.savefig(fig)
+
+
+def _text_page(pdf, title, lines):
+    fig = Figure(figsize=(11.69, 8.27))
+    fig.text(0.5, 0.6, title, ha="center", fontsize=24)
+    for offset, line in enumerate(lines):
+        fig.text(0.5, 0.5 - 0.04 * offset, line, ha="center", fontsize=12)
+    pdf.savefig(fig)
+
+
+def _table_pages(pdf, title, table, rows_per_page=TABLE_ROWS_PER_PAGE):
+    """
+    Write a DataFrame across as many pages as needed, one page at a time.
+
+    Tables are drawn as a single monospaced text block per page; matplotlib's
+    cell-based ``ax.table`` lays out every cell separately and is far slower.
+    Tables too wide for a portrait page are set in landscape.
+    """
+    n_pages = max(1, int(np.ceil(len(table) / rows_per_page)))
+    for page in range(n_pages):
+        chunk = table.iloc[page * rows_per_page:(page + 1) * rows_per_page]
+        text = chunk.to_string(index=False, float_format=lambda value: f"{value:.4f}")
+        wide = max(map(len, text.splitlines())) > TABLE_PORTRAIT_CHARS
+        fig = Figure(figsize=(11.69, 8.27) if wide else (8.27, 11.69))
+        fig.text(0.06, 0.9, text, family="monospace", fontsize=9, va="top")
+        suffix = f" ({page + 1}/{n_pages})" if n_pages > 1 else ""
+        fig.suptitle(f"{title}{suffix}", fontsize=14)
+        pdf.savefig(fig)
+
+
+def _scenario_tables(df, predictions):
+    """
+    Yield (title, table) pairs: one row per scenario, then annual means of the
+    actual and every scenario's predicted anomaly.
+    """
+    predicted = {
+        scenario_name: scenario_data["Predicted_Temperature_Anomaly_C"].to_numpy()
+        for scenario_name, scenario_data in predictions.items()
+    }
+    yield "Scenario Summary", pd.DataFrame([
+        {"Scenario": scenario_name, "CO2_Change": SCENARIOS[scenario_name][0],
+         "CH4_Change": SCENARIOS[scenario_name][1], "N2O_Change": SCENARIOS[scenario_name][2],
+         "Average_Anomaly": values.mean(), "Min_Anomaly": values.min(), "Max_Anomaly": values.max()}
+        for scenario_name, values in predicted.items()
+    ])
+    annual = pd.DataFrame({"Year": df["Year"].to_numpy(), "Actual": df["Temperature_Anomaly_C"].to_numpy(), **predicted})
+    yield "Annual Mean Temperature Anomaly by Scenario", annual.groupby("Year", as_index=False).mean()
+
+
+def build_report(dataset_path="fully_cleaned_global_warming_sim_dataset.csv",
+                 output_path="report/global_warming_report.pdf",
+                 report_dir=REPORT_DIR, workers=None, force=False):
+    """
+    Build the PDF report, rendering only stale figures in a process pool.
+
+    Pages are written to the PDF one at a time in report order, so at most one
+    page figure is held in memory while the remaining images are still rendering.
+    The PDF is written under a temporary name and only replaces ``output_path``
+    once every page succeeded.
+    """
+    os.makedirs(report_dir, exist_ok=True)
+    manifest = _load_manifest(report_dir)
+    source_path = resolve_dataset_path(dataset_path)
+    dataset_hash = file_digest(source_path)
+
+    # Build (or load) the scenario store once, before any scenario renderer needs it
+    df = read_dataset(dataset_path)
+    with span("scenario predictions", "model"):
+        predictions = simulation.scenario_predictions(df)
+
+    pending = {}
+    code_hashes = {}
+    figures = report_figures()
+    partial = f"{output_path}.{os.getpid()}.tmp"
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_render_worker) as executor:
+        for title, file_name, renderer, params, producer in figures:
+            image_path = os.path.join(report_dir, file_name)
+            # A figure depends on its renderer's module and every local module it imports
+            if renderer.__module__ not in code_hashes:
+                code_hashes[renderer.__module__] = module_digest(renderer)
+            fingerprint = combine_digests(dataset_hash, code_hashes[renderer.__module__], params)
+            if force or not _is_fresh(image_path, fingerprint, manifest, source_path, producer):
+                pending[file_name] = executor.submit(run_task, renderer, (dataset_path, image_path), params)
+            manifest[file_name] = fingerprint
+
+        try:
+            with PdfPages(partial) as pdf:
+                _text_page(pdf, "Global Warming Analysis Report", [
+                    f"Dataset: {source_path}",
+                    f"Figures: {len(figures)} ({len(pending)} rendered, {len(figures) - len(pending)} reused)",
+                    f"Scenarios: {', '.join(name.replace('_', ' ') for name in SCENARIOS)}"
+                ])
+                for title, file_name, _, _, _ in figures:
+                    if file_name in pending:
+                        # Rendering happens in the pool; this measures how long the PDF waits for it
+                        with span(f"wait {file_name}", "render"):
+                            task_result(pending[file_name])
+                    with span(f"page {file_name}", "write"):
+                        _image_page(pdf, title, os.path.join(report_dir, file_name))
+                with span("scenario tables", "write"):
+                    for title, table in _scenario_tables(df, predictions):
+                        _table_pages(pdf, title, table)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+    os.replace(partial, output_path)
+
+    _save_manifest(report_dir, manifest)
+    print(f"Saved: {output_path} ({len(pending)} figures rendered, {len(figures) - len(pending)} reused)")
+    return output_path
+
+
+if __name__ == "__main__":
+    build_report()
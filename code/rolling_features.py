@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+STATS = ("mean", "std", "min", "max", "anomaly")
+
+
+def feature_name(column, stat, window=None):
+    if window is None:
+        return f"{column}_{stat.capitalize()}"
+    return f"{column}_Rolling_{stat.capitalize()}_{window}"
+
+
+class RollingFeatureEngine:
+    """
+    Rolling-window features for several columns and windows in one pass.
+
+    Means and standard deviations for every window come from a single pair of
+    cumulative sums (of values and squared values); minima and maxima use a
+    strided window view. The input frame is never modified: features are
+    returned as a separate frame on the same index.
+
+    The last ``max(windows) - 1`` rows are kept after ``fit_transform`` so that
+    ``update`` can compute features for newly appended months without
+    revisiting the history. Anomalies are taken against the monthly
+    climatology of the data passed to ``fit_transform`` (or of ``baseline_years``).
+    """
+
+    def __init__(self, columns, windows=(12,), stats=STATS, month_col="Month", year_col="Year", baseline_years=None):
+        self.columns = list(columns)
+        self.windows = sorted(set(windows))
+        self.stats = list(stats)
+        self.month_col = month_col
+        self.year_col = year_col
+        self.baseline_years = baseline_years
+        self.climatology = None
+        self.shift = None
+        self._tail = None
+
+    def _fit_climatology(self, data):
+        if "anomaly" not in self.stats or self.month_col not in data.columns:
+            return None
+        baseline = data
+        if self.baseline_years is not None:
+            first, last = self.baseline_years
+            baseline = data[data[self.year_col].between(first, last)]
+        return baseline.groupby(self.month_col)[self.columns].mean().astype("float64")
+
+    def _compute(self, values, months, n_history):
+        """
+        Features for ``values[n_history:]`` given ``n_history`` leading rows of context.
+        """
+        n, k = values.shape
+        missing = np.isnan(values)
+        centred = np.where(missing, 0.0, values - self.shift)
+
+        # One cumulative pass for sums, squared sums and missing counts
+        csum = np.zeros((n + 1, k))
+        csq = np.zeros((n + 1, k))
+        cmiss = np.zeros((n + 1, k), dtype=np.int64)
+        np.cumsum(centred, axis=0, out=csum[1:])
+        np.cumsum(centred * centred, axis=0, out=csq[1:])
+        np.cumsum(missing, axis=0, out=cmiss[1:])
+
+        features = {}
+        rows = np.arange(n_history, n)
+        for window in self.windows:
+            full = rows >= window - 1
+            stop = rows[full] + 1
+            start = stop - window
+            window_sum = csum[stop] - csum[start]
+            complete = (cmiss[stop] - cmiss[start]) == 0
+            if "mean" in self.stats:
+                mean = np.full((len(rows), k), np.nan)
+                mean[full] = np.where(complete, window_sum / window + self.shift, np.nan)
+                for i, col in enumerate(self.columns):
+                    features[feature_name(col, "mean", window)] = mean[:, i]
+            if "std" in self.stats:
+                std = np.full((len(rows), k), np.nan)
+                if window > 1:
+                    variance = (csq[stop] - csq[start] - window_sum * window_sum / window) / (window - 1)
+                    std[full] = np.where(complete, np.sqrt(np.clip(variance, 0, None)), np.nan)
+                for i, col in enumerate(self.columns):
+                    features[feature_name(col, "std", window)] = std[:, i]
+            if "min" in self.stats or "max" in self.stats:
+                first_start = max(n_history - window + 1, 0)
+                span = values[first_start:]
+                view = sliding_window_view(span, window, axis=0) if len(span) >= window else np.empty((0, k, window))
+                offset = len(rows) - view.shape[0]
+                for stat, reduce in (("min", np.min), ("max", np.max)):
+                    if stat not in self.stats:
+                        continue
+                    result = np.full((len(rows), k), np.nan)
+                    if view.shape[0] > 0:
+                        result[offset:] = reduce(view, axis=-1)
+                    for i, col in enumerate(self.columns):
+                        features[feature_name(col, stat, window)] = result[:, i]
+        if self.climatology is not None and months is not None:
+            normals = self.climatology.reindex(months[n_history:]).to_numpy()
+            anomaly = values[n_history:] - normals
+            for i, col in enumerate(self.columns):
+                features[feature_name(col, "anomaly")] = anomaly[:, i]
+        return features
+
+    def fit_transform(self, data):
+        """
+        Compute features for ``data`` and remember the state needed by ``update``.
+        """
+        values = data[self.columns].to_numpy(dtype="float64")
+        self.climatology = self._fit_climatology(data)
+        first_valid = np.nanmean(values[:max(self.windows)], axis=0) if len(values) else np.zeros(len(self.columns))
+        self.shift = np.nan_to_num(first_valid)
+        months = data[self.month_col].to_numpy() if self.month_col in data.columns else None
+        features = self._compute(values, months, 0)
+        self._remember(values, months)
+        return pd.DataFrame(features, index=data.index)
+
+    def update(self, new_rows):
+        """
+        Compute features for rows appended after the data seen so far.
+        """
+        if self._tail is None:
+            raise RuntimeError("Call fit_transform before update")
+        tail_values, tail_months = self._tail
+        new_values = new_rows[self.columns].to_numpy(dtype="float64")
+        values = np.vstack([tail_values, new_values])
+        months = None
+        if tail_months is not None and self.month_col in new_rows.columns:
+            months = np.concatenate([tail_months, new_rows[self.month_col].to_numpy()])
+        features = self._compute(values, months, len(tail_values))
+        self._remember(values, months)
+        return pd.DataFrame(features, index=new_rows.index)
+
+    def _remember(self, values, months):
+        keep = max(self.windows) - 1
+        start = max(len(values) - keep, 0)
+        self._tail = (values[start:].copy(), None if months is None else months[start:].copy())
+
+
+def rolling_features(data, columns, windows=(12,), stats=STATS, **kwargs):
+    """
+    Return a frame of rolling features for ``columns`` without touching ``data``.
+    """
+    return RollingFeatureEngine(columns, windows, stats, **kwargs).fit_transform(data)
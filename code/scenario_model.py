@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+from schema import model_precision
+
+FEATURES = ["CO2_Concentration_ppm", "CH4_Concentration_ppb", "N2O_Concentration_ppb"]
+TARGET = "Temperature_Anomaly_C"
+# Concentration changes (CO2 ppm, CH4 ppb, N2O ppb) of the named scenarios
+SCENARIOS = {
+    "No_Policy_Change": (2, 10, 1),
+    "Carbon_Neutral_2050": (-1, -5, -0.5),
+    "Global_Collaboration": (-2, -10, -1),
+    "Extreme_Mitigation": (-3, -15, -1.5),
+    "Worst_Case_Scenario": (3, 15, 1.5)
+}
+
+
+class ScenarioModel:
+    """
+    The scenario regression reduced to its coefficients.
+
+    Shifting the concentrations by a delta moves every prediction of the linear
+    model by ``delta @ coef``, so a batch of scenarios is one small matrix
+    product on top of the baseline predictions computed at fit time.
+    """
+
+    def __init__(self, coef, intercept, feature_means, baseline, years):
+        self.coef = np.asarray(coef, dtype="float64")
+        self.intercept = float(intercept)
+        self.feature_means = np.asarray(feature_means, dtype="float64")
+        self.baseline = np.asarray(baseline, dtype="float64")
+        self.years = np.asarray(years)
+
+    @classmethod
+    def fit(cls, data, test_size=0.2, random_state=42):
+        """
+        Fit on the same train split as simulation.py.
+        """
+        from sklearn.linear_model import LinearRegression
+        from sklearn.model_selection import train_test_split
+        X = model_precision(data[FEATURES])
+        X_train, _, y_train, _ = train_test_split(
+            X, model_precision(data[TARGET]), test_size=test_size, random_state=random_state
+        )
+        model = LinearRegression().fit(X_train, y_train)
+        return cls(model.coef_, model.intercept_, X.mean().to_numpy(), model.predict(X), data["Year"].to_numpy())
+
+    @staticmethod
+    def deltas(changes):
+        """
+        Coerce one (co2, ch4, n2o) change or a sequence of them to an (n, 3) float array.
+        """
+        return np.atleast_2d(np.asarray(changes, dtype="float64")).reshape(-1, len(FEATURES))
+
+    def shifts(self, changes):
+        return self.deltas(changes) @ self.coef
+
+    def predict_average(self, changes):
+        """
+        Mean predicted anomaly over the dataset for each scenario.
+        """
+        return self.feature_means @ self.coef + self.intercept + self.shifts(changes)
+
+    def predict_series(self, changes):
+        """
+        Predicted anomaly for every row, one row of the result per scenario.
+        """
+        return self.baseline[np.newaxis, :] + self.shifts(changes)[:, np.newaxis]
+
+    def summary(self, scenarios=SCENARIOS):
+        return pd.DataFrame({
+            "Scenario": list(scenarios),
+            "Average_Temperature_Anomaly": self.predict_average(list(scenarios.values()))
+        })
@@ -0,0 +1,269 @@
+import argparse
+import asyncio
+import json
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from instrumentation import span
+from scenario_model import FEATURES, SCENARIOS, TARGET, ScenarioModel
+from schema import model_precision
+from storage import read_dataset
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+FORECAST_YEARS = 50
+# Requests arriving within MAX_DELAY of the first one in a batch are predicted together
+MAX_DELAY = 0.002
+MAX_BATCH = 1024
+MAX_BODY_BYTES = 1 << 20
+CHANGE_FIELDS = ("co2_change", "ch4_change", "n2o_change")
+
+
+class ServiceError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests for a few milliseconds and runs them as one batch.
+
+    ``predict`` receives the list of queued items and returns one result per item.
+    """
+
+    def __init__(self, predict, max_batch=MAX_BATCH, max_delay=MAX_DELAY):
+        self.predict = predict
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.requests = 0
+        self.batches = 0
+        self._queue = None
+        self._worker = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            if self._queue.qsize() < self.max_batch - 1:
+                await asyncio.sleep(self.max_delay)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            items = [item for item, _ in batch]
+            try:
+                with span("predict_batch", "model", rows=len(items)):
+                    results = self.predict(items)
+            except Exception as error:
+                results = [error] * len(items)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+            self.requests += len(batch)
+            self.batches += 1
+
+
+def arima_forecast(data, steps=FORECAST_YEARS):
+    from statsmodels.tsa.arima.model import ARIMA
+    result = ARIMA(model_precision(data[TARGET]), order=(2, 1, 2)).fit()
+    return np.asarray(result.forecast(steps=steps))
+
+
+class ScenarioService:
+    """
+    HTTP/JSON endpoints over a preloaded scenario model and precomputed forecasts.
+
+    GET  /health               model and batching statistics
+    GET  /scenarios            the named scenarios and their concentration changes
+    POST /predict              {"co2_change", "ch4_change", "n2o_change"} or {"scenario"},
+                               optionally "series": true for the per-row predictions
+    GET  /forecast?years=N     the ARIMA forecast for the next N (<= 50) years
+    """
+
+    def __init__(self, data, max_batch=MAX_BATCH, max_delay=MAX_DELAY, forecast=True):
+        self.model = ScenarioModel.fit(data)
+        self.batcher = MicroBatcher(self._predict_batch, max_batch, max_delay)
+        self.first_forecast_year = int(data["Year"].max()) + 1
+        self.forecast = arima_forecast(data) if forecast else None
+
+    def _predict_batch(self, items):
+        """
+        One vectorized prediction for every queued request; a request whose
+        prediction is not finite gets a ServiceError instead of a result.
+        """
+        changes = np.array([item["changes"] for item in items])
+        wants_series = [i for i, item in enumerate(items) if item["series"]]
+        with np.errstate(over="ignore", invalid="ignore"):
+            averages = self.model.predict_average(changes)
+            series = dict(zip(wants_series, self.model.predict_series(changes[wants_series]))) if wants_series else {}
+        results = []
+        for i, (item, average) in enumerate(zip(items, averages)):
+            # Huge changes overflow the prediction; JSON has no Infinity, so reject just this request
+            if not np.isfinite(average) or (item["series"] and not np.all(np.isfinite(series[i]))):
+                results.append(ServiceError(HTTPStatus.BAD_REQUEST, "Changes too large: the prediction is not finite"))
+                continue
+            result = dict(zip(CHANGE_FIELDS, map(float, item["changes"])))
+            result["average_temperature_anomaly"] = float(average)
+            if item["series"]:
+                result["years"] = self.model.years.tolist()
+                result["predicted_temperature_anomaly"] = series[i].tolist()
+            results.append(result)
+        return results
+
+    @staticmethod
+    def _parse_prediction(body):
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Body must be JSON")
+        if not isinstance(payload, dict):
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+        if "scenario" in payload:
+            if not isinstance(payload["scenario"], str):
+                raise ServiceError(HTTPStatus.BAD_REQUEST, "scenario must be a string")
+            if payload["scenario"] not in SCENARIOS:
+                raise ServiceError(HTTPStatus.NOT_FOUND, f"Unknown scenario '{payload['scenario']}'")
+            changes = SCENARIOS[payload["scenario"]]
+        else:
+            try:
+                changes = tuple(float(payload.get(field, 0.0)) for field in CHANGE_FIELDS)
+            except (TypeError, ValueError):
+                raise ServiceError(HTTPStatus.BAD_REQUEST, f"{', '.join(CHANGE_FIELDS)} must be numbers")
+            if not all(np.isfinite(changes)):
+                raise ServiceError(HTTPStatus.BAD_REQUEST, "Changes must be finite")
+        return {"changes": changes, "series": bool(payload.get("series", False))}
+
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        if url.path == "/predict":
+            if method != "POST":
+                raise ServiceError(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST")
+            return await self.batcher.submit(self._parse_prediction(body))
+        if method != "GET":
+            raise ServiceError(HTTPStatus.METHOD_NOT_ALLOWED, "Use GET")
+        if url.path == "/health":
+            return {"status": "ok", "features": FEATURES, "requests": self.batcher.requests,
+                    "batches": self.batcher.batches}
+        if url.path == "/scenarios":
+            return {name: dict(zip(CHANGE_FIELDS, changes)) for name, changes in SCENARIOS.items()}
+        if url.path == "/forecast":
+            if self.forecast is None:
+                raise ServiceError(HTTPStatus.NOT_FOUND, "Forecasts are disabled")
+            query = parse_qs(url.query)
+            try:
+                years = int(query.get("years", [len(self.forecast)])[0])
+            except ValueError:
+                raise ServiceError(HTTPStatus.BAD_REQUEST, "years must be an integer")
+            if not 1 <= years <= len(self.forecast):
+                raise ServiceError(HTTPStatus.BAD_REQUEST, f"years must be between 1 and {len(self.forecast)}")
+            return {"model": "arima", "years": list(range(self.first_forecast_year, self.first_forecast_year + years)),
+                    "forecast": self.forecast[:years].tolist()}
+        raise ServiceError(HTTPStatus.NOT_FOUND, f"No route for {url.path}")
+
+    async def _respond(self, request_line, headers, reader):
+        """
+        Answer one request as ``(status, payload, keep_alive)``.
+
+        Malformed requests get a 400 and unexpected failures (e.g. in a prediction
+        batch) a 500, instead of the connection being dropped without a response.
+        """
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+            length = int(headers.get("content-length", 0))
+            if length < 0:
+                raise ValueError(f"Negative Content-Length {length}")
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, {"error": "Malformed request line or Content-Length"}, False
+        if length > MAX_BODY_BYTES:
+            return HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Body too large"}, False
+        body = await reader.readexactly(length)
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        try:
+            return HTTPStatus.OK, await self.dispatch(method, target, body), keep_alive
+        except ServiceError as error:
+            return error.status, {"error": str(error)}, keep_alive
+        except Exception as error:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(error).__name__}: {error}"}, keep_alive
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serve HTTP/1.1 requests on one connection until the client closes it.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                status, payload, keep_alive = await self._respond(request_line, headers, reader)
+                content = json.dumps(payload).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(content)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + content
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+        self.batcher.start()
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Serving scenario predictions on http://{host}:{server.sockets[0].getsockname()[1]}")
+        if ready is not None:
+            ready.set_result(server.sockets[0].getsockname()[1])
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve scenario predictions and forecasts over HTTP/JSON.")
+    parser.add_argument("--dataset", default="fully_cleaned_global_warming_sim_dataset.csv")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="largest merged prediction")
+    parser.add_argument("--max-delay-ms", type=float, default=MAX_DELAY * 1e3, help="how long a batch waits for more requests")
+    parser.add_argument("--no-forecast", action="store_true", help="skip fitting the ARIMA forecast at startup")
+    args = parser.parse_args(argv)
+
+    data = read_dataset(args.dataset, columns=["Year", "Month", TARGET] + FEATURES)
+    service = ScenarioService(data, args.max_batch, args.max_delay_ms / 1e3, forecast=not args.no_forecast)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+from fingerprint import combine_digests, frame_fingerprint
+from instrumentation import span
+from scenario_model import FEATURES, ScenarioModel
+from storage import read_dataset, write_dataset
+
+CACHE_DIR = ".cache"
+CLEANED_DATASET = "fully_cleaned_global_warming_sim_dataset.csv"
+# (start, stop, step) of the CO2 ppm, CH4 ppb and N2O ppb changes; the steps match the app's sliders
+SCENARIO_GRID = ((-10.0, 10.0, 0.5), (-50.0, 50.0, 5.0), (-5.0, 5.0, 0.5))
+# Scenarios whose predictions are computed and written at a time
+BUILD_BATCH = 1024
+# Refuse to build stores whose prediction matrix would exceed this
+MAX_STORE_BYTES = 2 * 2 ** 30
+SUMMARY_COLUMNS = ["Key", "CO2_Change", "CH4_Change", "N2O_Change", "Average_Temperature_Anomaly",
+                   "Min_Temperature_Anomaly", "Max_Temperature_Anomaly"]
+
+
+def grid_axes(grid=SCENARIO_GRID):
+    return [np.round(np.arange(start, stop + step / 2, step), 10) for start, stop, step in grid]
+
+
+class ScenarioStore:
+    """
+    Precomputed scenario predictions on a quantised grid of concentration changes.
+
+    Each grid point has a packed integer key (its row-major position in the grid).
+    ``summary`` holds one row per scenario sorted by key, and ``predictions``
+    (memory-mapped when loaded) holds the matching per-row predicted anomalies.
+    Lookups binary-search the keys; off-grid changes are interpolated
+    trilinearly between the surrounding grid points, which is exact for the
+    linear scenario model up to float32 rounding.
+    """
+
+    def __init__(self, grid, summary, predictions, years, version=None):
+        self.grid = tuple(tuple(float(value) for value in axis) for axis in grid)
+        self.axes = grid_axes(self.grid)
+        self.shape = tuple(len(axis) for axis in self.axes)
+        self.summary = summary
+        self.keys = summary["Key"].to_numpy()
+        self.averages = summary["Average_Temperature_Anomaly"].to_numpy()
+        self.predictions = predictions
+        self.years = years
+        self.version = version
+
+    def key(self, indices):
+        """
+        Packed key of grid indices ``(i_co2, i_ch4, i_n2o)`` (arrays allowed).
+        """
+        return np.ravel_multi_index(tuple(np.asarray(index) for index in indices), self.shape)
+
+    def _rows(self, keys):
+        rows = np.searchsorted(self.keys, keys)
+        found = (rows < len(self.keys)) & (self.keys[np.minimum(rows, len(self.keys) - 1)] == keys)
+        if not np.all(found):
+            raise KeyError("Scenario not in the store")
+        return rows
+
+    def _corners(self, changes):
+        """
+        Store rows and trilinear weights of the grid points around ``changes``.
+        """
+        lower, fractions = [], []
+        for value, (start, stop, step), size in zip(changes, self.grid, self.shape):
+            if not start - 1e-9 <= value <= stop + 1e-9:
+                raise ValueError(f"Change {value} outside the stored range [{start}, {stop}]")
+            position = min(max((value - start) / step, 0.0), size - 1)
+            # Snap values that are on the grid up to rounding
+            if abs(position - round(position)) < 1e-9:
+                position = float(round(position))
+            index = min(int(np.floor(position)), size - 2) if size > 1 else 0
+            lower.append(index)
+            fractions.append(position - index)
+        corners = np.array(np.meshgrid(*[[0, 1]] * len(FEATURES), indexing="ij")).reshape(len(FEATURES), -1).T
+        weights = np.prod(np.where(corners == 1, fractions, 1 - np.array(fractions)), axis=1)
+        used = weights > 0
+        indices = (np.array(lower) + corners[used]).T
+        return self._rows(self.key(indices)), weights[used]
+
+    def lookup(self, co2_change, ch4_change, n2o_change):
+        """
+        Return ``(predictions, average)`` for one scenario.
+        """
+        rows, weights = self._corners((co2_change, ch4_change, n2o_change))
+        predictions = weights @ np.asarray(self.predictions[rows], dtype="float64")
+        return predictions, float(weights @ self.averages[rows])
+
+    def lookup_average(self, changes):
+        """
+        Average predicted anomaly for each ``(co2, ch4, n2o)`` in ``changes``.
+        """
+        averages = []
+        for change in ScenarioModel.deltas(changes):
+            rows, weights = self._corners(change)
+            averages.append(float(weights @ self.averages[rows]))
+        return np.array(averages)
+
+    def scenario_frame(self, co2_change, ch4_change, n2o_change):
+        predictions, _ = self.lookup(co2_change, ch4_change, n2o_change)
+        return pd.DataFrame({"Year": self.years, "Predicted_Temperature_Anomaly_C": predictions})
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        write_dataset(self.summary, os.path.join(path, "summary.csv"), compact=False)
+        np.save(os.path.join(path, "years.npy"), self.years)
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as handle:
+            json.dump({"grid": self.grid, "version": self.version, "rows": len(self.years)}, handle)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as handle:
+            meta = json.load(handle)
+        summary = read_dataset(os.path.join(path, "summary.csv"), compact=False)
+        predictions = np.load(os.path.join(path, "predictions.npy"), mmap_mode="r" if mmap else None)
+        years = np.load(os.path.join(path, "years.npy"))
+        return cls(meta["grid"], summary, predictions, years, meta["version"])
+
+
+def build_store(data, path, grid=SCENARIO_GRID, model=None, version=None, max_bytes=MAX_STORE_BYTES):
+    """
+    Evaluate every grid scenario and write the store to the directory ``path``.
+
+    Predictions are computed ``BUILD_BATCH`` scenarios at a time straight into a
+    memory-mapped ``.npy`` file, so memory stays bounded by the batch.
+    """
+    model = model or ScenarioModel.fit(data)
+    axes = grid_axes(grid)
+    changes = np.array(np.meshgrid(*axes, indexing="ij")).reshape(len(axes), -1).T
+    if len(changes) * len(data) * 4 > max_bytes:
+        raise ValueError(f"A store of {len(changes)} scenarios x {len(data)} rows exceeds {max_bytes} bytes")
+
+    # Per-process scratch directory: pooled renderers may build the same store at once
+    partial = f"{path}.{os.getpid()}.tmp"
+    shutil.rmtree(partial, ignore_errors=True)
+    os.makedirs(partial)
+    with span("scenario_store_build", "model", rows=len(changes) * len(data)):
+        predictions = np.lib.format.open_memmap(
+            os.path.join(partial, "predictions.npy"), mode="w+", dtype="float32", shape=(len(changes), len(data))
+        )
+        minimum, maximum = np.empty(len(changes)), np.empty(len(changes))
+        for start in range(0, len(changes), BUILD_BATCH):
+            batch = model.predict_series(changes[start:start + BUILD_BATCH])
+            predictions[start:start + len(batch)] = batch
+            minimum[start:start + len(batch)] = batch.min(axis=1)
+            maximum[start:start + len(batch)] = batch.max(axis=1)
+        predictions.flush()
+        del predictions
+
+    summary = pd.DataFrame(changes, columns=["CO2_Change", "CH4_Change", "N2O_Change"])
+    summary.insert(0, "Key", np.arange(len(changes), dtype="int64"))
+    summary["Average_Temperature_Anomaly"] = model.predict_average(changes)
+    summary["Min_Temperature_Anomaly"] = minimum
+    summary["Max_Temperature_Anomaly"] = maximum
+    store = ScenarioStore(grid, summary[SUMMARY_COLUMNS], None, np.asarray(data["Year"]), version)
+    store.save(partial)
+    if os.path.exists(os.path.join(path, "meta.json")):
+        # Another process finished the same store first; keep it so its readers are undisturbed
+        shutil.rmtree(partial)
+    else:
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(partial, path)
+    return ScenarioStore.load(path)
+
+
+def load_or_build_store(data, cache_dir=CACHE_DIR, grid=SCENARIO_GRID):
+    """
+    Return the store for this dataset version and grid, building and caching it on first use.
+    """
+    version = frame_fingerprint(data)
+    path = os.path.join(cache_dir, f"scenario_store_{combine_digests(version, grid)[:16]}")
+    if os.path.exists(os.path.join(path, "meta.json")):
+        return ScenarioStore.load(path)
+    return build_store(data, path, grid, version=version)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the scenario store and look up scenarios.")
+    parser.add_argument("--dataset", default=CLEANED_DATASET)
+    parser.add_argument("--scenario", nargs=3, type=float, action="append", metavar=("CO2", "CH4", "N2O"),
+                        help="concentration changes to look up (repeatable)")
+    args = parser.parse_args(argv)
+
+    store = load_or_build_store(read_dataset(args.dataset))
+    print(f"Scenario store: {len(store.keys)} scenarios x {len(store.years)} rows")
+    for changes in args.scenario or []:
+        print(f"  CO2 {changes[0]:+g} ppm, CH4 {changes[1]:+g} ppb, N2O {changes[2]:+g} ppb: "
+              f"average anomaly {store.lookup_average([changes])[0]:.4f} °C")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
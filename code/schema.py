@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+# Compact in-memory types for the climate dataset. Files on disk keep full
+# precision; the schema is applied when loading. Measurements are float32 in
+# memory; model code upcasts its inputs with model_precision() before fitting.
+DATASET_SCHEMA = {
+    "Year": "int16",
+    "Month": "int8",
+    "CO2_Concentration_ppm": "float32",
+    "CH4_Concentration_ppb": "float32",
+    "N2O_Concentration_ppb": "float32",
+    "Temperature_Anomaly_C": "float32",
+    "Renewable_Energy_Usage_Percentage": "float32",
+    "Fossil_Energy_Usage_Percentage": "float32",
+    "Forest_Area_Hectares": "float32",
+    "Natural_Disasters_Count": "int16",
+    "Glacier_Melting_Rate_km2": "float32"
+}
+
+# Nullable equivalents used while parsing, so gaps in raw files still load
+_NULLABLE_INTS = {"int8": "Int8", "int16": "Int16", "int32": "Int32"}
+
+
+def parse_dtypes(columns=None):
+    """
+    Return the dtype mapping to pass to ``pd.read_csv`` for ``columns``.
+    """
+    columns = DATASET_SCHEMA if columns is None else [col for col in columns if col in DATASET_SCHEMA]
+    return {col: _NULLABLE_INTS.get(DATASET_SCHEMA[col], DATASET_SCHEMA[col]) for col in columns}
+
+
+def apply_schema(df, floats=True):
+    """
+    Cast known columns to their compact types.
+
+    Integer columns that still contain missing values keep a nullable integer
+    type until they have been filled. With ``floats=False`` only the (lossless)
+    integer casts are applied, e.g. to data that is about to be saved.
+    """
+    casts = {}
+    for col in df.columns:
+        dtype = DATASET_SCHEMA.get(col)
+        if dtype is None or df[col].dtype == dtype or (not floats and dtype.startswith("float")):
+            continue
+        if dtype in _NULLABLE_INTS and df[col].isna().any():
+            dtype = _NULLABLE_INTS[dtype]
+        elif dtype in _NULLABLE_INTS:
+            info = np.iinfo(dtype)
+            if df[col].min() < info.min or df[col].max() > info.max:
+                raise ValueError(f"Column '{col}' does not fit in {dtype}")
+        casts[col] = dtype
+    return df.astype(casts) if casts else df
+
+
+def model_precision(data):
+    """
+    Return a float64 copy of a frame or series for model fitting.
+    """
+    if isinstance(data, pd.Series):
+        return data.astype("float64")
+    return data.astype({col: "float64" for col in data.columns})
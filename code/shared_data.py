@@ -0,0 +1,124 @@
+import os
+import uuid
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# Segments attached in this process. They stay open for the life of the process
+# because the arrays handed to pandas point straight into them.
+_attached = {}
+
+
+class DatasetDescriptor:
+    """
+    Small picklable schema of a published dataset: row count, index and, per
+    column, its name, NumPy dtype and shared-memory segment name.
+    """
+
+    def __init__(self, rows, columns, index):
+        self.rows = rows
+        self.columns = columns
+        self.index = index
+
+    def __repr__(self):
+        return f"DatasetDescriptor(rows={self.rows}, columns={[entry['name'] for entry in self.columns]})"
+
+
+class SharedDataset:
+    """
+    Numeric columns of a DataFrame copied once into named shared-memory buffers.
+
+    The publishing process owns the segments and unlinks them on ``close``;
+    usable as a context manager.
+    """
+
+    def __init__(self, descriptor, segments):
+        self.descriptor = descriptor
+        self._segments = segments
+
+    def close(self):
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
+        self._segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def _column_values(series):
+    if pd.api.types.is_extension_array_dtype(series.dtype):
+        if not pd.api.types.is_numeric_dtype(series.dtype):
+            raise TypeError(f"Column '{series.name}' is not numeric")
+        if series.isna().any():
+            return series.to_numpy(dtype="float64", na_value=np.nan)
+        return series.to_numpy(dtype=series.dtype.numpy_dtype)
+    values = series.to_numpy()
+    if values.dtype.kind not in "biuf":
+        raise TypeError(f"Column '{series.name}' is not numeric")
+    return values
+
+
+def shareable(df):
+    """
+    True when every column (and the index) can be published.
+    """
+    numeric = all(pd.api.types.is_numeric_dtype(dtype) for dtype in df.dtypes)
+    return numeric and (isinstance(df.index, pd.RangeIndex) or pd.api.types.is_numeric_dtype(df.index.dtype))
+
+
+def publish_dataset(df, columns=None):
+    """
+    Copy the numeric ``columns`` of ``df`` (all by default) into shared memory.
+
+    Returns a ``SharedDataset``; pass its ``descriptor`` to worker processes.
+    Nullable integer columns with gaps are published as float64.
+    """
+    columns = list(df.columns) if columns is None else list(columns)
+    prefix = f"gwf_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+    segments = []
+
+    def share(values, suffix):
+        values = np.ascontiguousarray(values)
+        segment = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1), name=f"{prefix}_{suffix}")
+        segments.append(segment)
+        np.ndarray(values.shape, dtype=values.dtype, buffer=segment.buf)[:] = values
+        return {"dtype": values.dtype.str, "segment": segment.name}
+
+    try:
+        entries = [dict(name=col, **share(_column_values(df[col]), position)) for position, col in enumerate(columns)]
+        if isinstance(df.index, pd.RangeIndex):
+            index = (df.index.start, df.index.stop, df.index.step)
+        else:
+            index = dict(name=df.index.name, **share(_column_values(df.index.to_series()), "index"))
+    except BaseException:
+        SharedDataset(None, segments).close()
+        raise
+    return SharedDataset(DatasetDescriptor(len(df), entries, index), segments)
+
+
+def _attach_array(entry, rows):
+    segment = _attached.get(entry["segment"])
+    if segment is None:
+        segment = _attached[entry["segment"]] = shared_memory.SharedMemory(name=entry["segment"])
+    values = np.ndarray((rows,), dtype=np.dtype(entry["dtype"]), buffer=segment.buf)
+    # Shared by every worker: writes must go to a copy
+    values.flags.writeable = False
+    return values
+
+
+def attach_dataset(descriptor):
+    """
+    Return a DataFrame whose columns are read-only views of the published buffers (no copy).
+    """
+    columns = {entry["name"]: _attach_array(entry, descriptor.rows) for entry in descriptor.columns}
+    if isinstance(descriptor.index, tuple):
+        index = pd.RangeIndex(*descriptor.index)
+    else:
+        index = pd.Index(_attach_array(descriptor.index, descriptor.rows), name=descriptor.index["name"], copy=False)
+    return pd.DataFrame(columns, index=index, copy=False)
@@ -1,49 +1,39 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import seaborn as sns
 from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, r2_score
 from statsmodels.tsa.arima.model import ARIMA
 import os
 
-# Load the cleaned dataset
-df = pd.read_csv("fully_cleaned_global_warming_sim_dataset.csv")
+from aggregate_cube import load_or_build_cube
+from correlation import CHUNK_SIZE, load_or_compute_correlation, render_correlation_heatmap
+from instrumentation import span
+from parallel import run_tasks
+from scenario_model import FEATURES, SCENARIOS, TARGET
+from scenario_store import load_or_build_store
+from schema import model_precision
+from storage import read_dataset
 
-# Feature Selection
-X = df[["CO2_Concentration_ppm", "CH4_Concentration_ppb", "N2O_Concentration_ppb"]]
-y = df["Temperature_Anomaly_C"]
+CLEANED_DATASET = "fully_cleaned_global_warming_sim_dataset.csv"
+REPORT_DIR = "report"
+FORECAST_YEARS = 50
 
-# Train-test split
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
 # Linear Regression Model
-model = LinearRegression()
-model.fit(X_train, y_train)
-
-# Model evaluation
-y_pred = model.predict(X_test)
-mse = mean_squared_error(y_test, y_pred)
-r2 = r2_score(y_test, y_pred)
-
-print(f"Model Evaluation:")
-print(f"  Mean Squared Error: {mse:.4f}")
-print(f"  R² Score: {r2:.4f}")
-
-# Advanced Statistical Analysis
-print("\nAdvanced Statistical Analysis:")
-corr_matrix = df.corr()
-print("Correlation Matrix:")
-print(corr_matrix)
-
-# Heatmap of Correlations
-plt.figure(figsize=(10, 8))
-sns.heatmap(corr_matrix, annot=True, cmap="coolwarm", fmt=".2f")
-plt.title("Correlation Matrix Heatmap")
-plt.savefig("report/correlation_matrix_heatmap.png")
-plt.close()
-print("Saved: report/correlation_matrix_heatmap.png")
+def fit_model(df, test_size=0.2, random_state=42):
+    """
+    Fit the scenario regression; returns the model and the held-out test split.
+    """
+    X = model_precision(df[FEATURES])
+    y = model_precision(df[TARGET])
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+    model = LinearRegression()
+    with span("regression_fit", "model", rows=len(X_train)):
+        model.fit(X_train, y_train)
+    return model, X_test, y_test
+
 
 # Function to simulate scenarios
 def simulate_scenario(model, df, scenario_name, co2_change, ch4_change, n2o_change):
@@ -52,87 +42,184 @@ def simulate_scenario(model, df, scenario_name, co2_change, ch4_change, n2o_chan
     scenario_data["CH4_Concentration_ppb"] += ch4_change
     scenario_data["N2O_Concentration_ppb"] += n2o_change
     scenario_data["Predicted_Temperature_Anomaly_C"] = model.predict(
-        scenario_data[["CO2_Concentration_ppm", "CH4_Concentration_ppb", "N2O_Concentration_ppb"]]
+        model_precision(scenario_data[["CO2_Concentration_ppm", "CH4_Concentration_ppb", "N2O_Concentration_ppb"]])
     )
     return scenario_data
 
-# Define scenarios
-scenarios = {
-    "No_Policy_Change": (2, 10, 1),  # Gradual increase in emissions
-    "Carbon_Neutral_2050": (-1, -5, -0.5),  # Slow decrease in emissions
-    "Global_Collaboration": (-2, -10, -1),  # Rapid decrease in emissions
-    "Extreme_Mitigation": (-3, -15, -1.5),  # Extremely rapid decrease in emissions
-    "Worst_Case_Scenario": (3, 15, 1.5)  # Extremely rapid increase in emissions
-}
-
-# Simulate scenarios
-scenario_results = {}
-for scenario_name, (co2_change, ch4_change, n2o_change) in scenarios.items():
-    scenario_results[scenario_name] = simulate_scenario(model, df, scenario_name, co2_change, ch4_change, n2o_change)
-
-# Plot and save results for scenarios
-for scenario_name, scenario_data in scenario_results.items():
-    plt.figure(figsize=(12, 6))
-    plt.plot(df["Year"], df["Temperature_Anomaly_C"], label="Actual", linestyle="--", color="blue")
-    plt.plot(scenario_data["Year"], scenario_data["Predicted_Temperature_Anomaly_C"], label=f"{scenario_name}", color="red")
-    plt.title(f"Scenario: {scenario_name.replace('_', ' ')}")
-    plt.xlabel("Year")
-    plt.ylabel("Temperature Anomaly (°C)")
-    plt.legend()
-    plt.grid()
-    plt.savefig(f"report/{scenario_name}_Temperature_Anomaly.png")
-    plt.close()
-    print(f"Saved: report/{scenario_name}_Temperature_Anomaly.png")
+
+def simulate_scenarios(model, df, scenarios=SCENARIOS):
+    with span("scenario_loop", "model", rows=len(df) * len(scenarios)):
+        return {
+            scenario_name: simulate_scenario(model, df, scenario_name, co2_change, ch4_change, n2o_change)
+            for scenario_name, (co2_change, ch4_change, n2o_change) in scenarios.items()
+        }
+
+
+def scenario_predictions(df, scenarios=SCENARIOS):
+    """
+    Year and predicted anomaly of every scenario.
+
+    Looked up in the scenario store (built on first use for this dataset); datasets
+    too large to precompute are simulated directly with a freshly fitted model.
+    """
+    try:
+        store = load_or_build_store(df)
+    except ValueError:
+        model, _, _ = fit_model(df)
+        return {
+            scenario_name: scenario_data[["Year", "Predicted_Temperature_Anomaly_C"]]
+            for scenario_name, scenario_data in simulate_scenarios(model, df, scenarios).items()
+        }
+    with span("scenario_lookup", "model", rows=len(df) * len(scenarios)):
+        return {scenario_name: store.scenario_frame(*changes) for scenario_name, changes in scenarios.items()}
+
 
 # Advanced Time Series Forecasting with ARIMA
-print("\nTime Series Forecasting with ARIMA:")
-arima_model = ARIMA(df["Temperature_Anomaly_C"], order=(2, 1, 2))
-arima_result = arima_model.fit()
-
-# Forecast for the next 50 years
-forecast_years = 50
-forecast_index = pd.date_range(start="2025", periods=forecast_years, freq="Y")
-forecast = arima_result.forecast(steps=forecast_years)
-
-# Plot ARIMA forecast
-plt.figure(figsize=(12, 6))
-plt.plot(df["Year"], df["Temperature_Anomaly_C"], label="Actual Data", color="blue")
-plt.plot(forecast_index.year, forecast, label="Forecast", color="orange", linestyle="--")
-plt.title("ARIMA Forecast for Temperature Anomaly (Next 50 Years)")
-plt.xlabel("Year")
-plt.ylabel("Temperature Anomaly (°C)")
-plt.legend()
-plt.grid()
-plt.savefig("report/temperature_anomaly_forecast.png")
-plt.close()
-print("Saved: report/temperature_anomaly_forecast.png")
-
-# Scenario Comparisons
-plt.figure(figsize=(12, 8))
-for scenario_name, scenario_data in scenario_results.items():
-    plt.plot(
-        scenario_data["Year"], 
-        scenario_data["Predicted_Temperature_Anomaly_C"], 
-        label=f"{scenario_name.replace('_', ' ')}"
+def forecast_arima(df, forecast_years=FORECAST_YEARS, order=(2, 1, 2)):
+    """
+    Fit ARIMA on the temperature anomaly; returns the forecast years and values.
+    """
+    arima_model = ARIMA(model_precision(df[TARGET]), order=order)
+    with span("arima_fit", "model", rows=len(df)):
+        arima_result = arima_model.fit()
+    first_year = int(df["Year"].max()) + 1
+    with span("arima_forecast", "model"):
+        forecast = arima_result.forecast(steps=forecast_years)
+    return np.arange(first_year, first_year + forecast_years), forecast
+
+
+def scenario_summary(model, df, scenarios=SCENARIOS):
+    """
+    Average predicted anomaly of every scenario.
+
+    The model is linear, so the average predicted anomaly equals the prediction at the
+    average (shifted) concentrations, which the aggregate cube already holds.
+    """
+    cube = load_or_build_cube(df)
+    feature_means = cube.summary(FEATURES)["mean"].to_numpy()
+    scenario_inputs = pd.DataFrame(
+        [feature_means + np.array(changes) for changes in scenarios.values()], columns=FEATURES
     )
-plt.plot(df["Year"], df["Temperature_Anomaly_C"], label="Actual", linestyle="--", color="black")
-plt.title("Scenario Comparisons for Temperature Anomaly")
-plt.xlabel("Year")
-plt.ylabel("Temperature Anomaly (°C)")
-plt.legend()
-plt.grid()
-plt.savefig("report/scenario_comparisons.png")
-plt.close()
-print("Saved: report/scenario_comparisons.png")
-
-# Generate summary table for scenarios
-scenario_summary = pd.DataFrame({
-    "Scenario": list(scenario_results.keys()),
-    "Average_Temperature_Anomaly": [
-        scenario_data["Predicted_Temperature_Anomaly_C"].mean() for scenario_data in scenario_results.values()
+    return pd.DataFrame({
+        "Scenario": list(scenarios.keys()),
+        "Average_Temperature_Anomaly": model.predict(scenario_inputs)
+    })
+
+
+# Figures; each writes one PNG so they can be rendered in separate processes
+def plot_correlation(correlation, output_path):
+    with span("correlation_matrix_heatmap", "render"):
+        render_correlation_heatmap(correlation, output_path, "Correlation Matrix Heatmap")
+    return output_path
+
+
+def plot_scenario(df, scenario_data, scenario_name, output_path):
+    with span(f"{scenario_name}_Temperature_Anomaly", "render"):
+        plt.figure(figsize=(12, 6))
+        plt.plot(df["Year"], df["Temperature_Anomaly_C"], label="Actual", linestyle="--", color="blue")
+        plt.plot(scenario_data["Year"], scenario_data["Predicted_Temperature_Anomaly_C"], label=f"{scenario_name}", color="red")
+        plt.title(f"Scenario: {scenario_name.replace('_', ' ')}")
+        plt.xlabel("Year")
+        plt.ylabel("Temperature Anomaly (°C)")
+        plt.legend()
+        plt.grid()
+        plt.savefig(output_path)
+        plt.close()
+    return output_path
+
+
+def plot_forecast(df, forecast_years, forecast, output_path):
+    with span("temperature_anomaly_forecast", "render"):
+        plt.figure(figsize=(12, 6))
+        plt.plot(df["Year"], df["Temperature_Anomaly_C"], label="Actual Data", color="blue")
+        plt.plot(forecast_years, forecast, label="Forecast", color="orange", linestyle="--")
+        plt.title(f"ARIMA Forecast for Temperature Anomaly (Next {len(forecast_years)} Years)")
+        plt.xlabel("Year")
+        plt.ylabel("Temperature Anomaly (°C)")
+        plt.legend()
+        plt.grid()
+        plt.savefig(output_path)
+        plt.close()
+    return output_path
+
+
+def plot_scenario_comparisons(df, scenario_results, output_path):
+    with span("scenario_comparisons", "render"):
+        plt.figure(figsize=(12, 8))
+        for scenario_name, scenario_data in scenario_results.items():
+            plt.plot(
+                scenario_data["Year"],
+                scenario_data["Predicted_Temperature_Anomaly_C"],
+                label=f"{scenario_name.replace('_', ' ')}"
+            )
+        plt.plot(df["Year"], df["Temperature_Anomaly_C"], label="Actual", linestyle="--", color="black")
+        plt.title("Scenario Comparisons for Temperature Anomaly")
+        plt.xlabel("Year")
+        plt.ylabel("Temperature Anomaly (°C)")
+        plt.legend()
+        plt.grid()
+        plt.savefig(output_path)
+        plt.close()
+    return output_path
+
+
+def main(input_path=CLEANED_DATASET, report_dir=REPORT_DIR, workers=1, chunk_size=CHUNK_SIZE):
+    """
+    Fit, evaluate and forecast, simulate every scenario and write the figures and summary.
+
+    With ``workers > 1`` the figures are rendered in a process pool that shares
+    the dataset through shared memory.
+    """
+    os.makedirs(report_dir, exist_ok=True)
+    df = read_dataset(input_path)
+
+    model, X_test, y_test = fit_model(df)
+
+    # Model evaluation
+    y_pred = model.predict(X_test)
+    mse = mean_squared_error(y_test, y_pred)
+    r2 = r2_score(y_test, y_pred)
+
+    print(f"Model Evaluation:")
+    print(f"  Mean Squared Error: {mse:.4f}")
+    print(f"  R² Score: {r2:.4f}")
+
+    # Advanced Statistical Analysis
+    print("\nAdvanced Statistical Analysis:")
+    with span("correlation", "analysis", rows=len(df)):
+        correlation = load_or_compute_correlation(df, chunk_size=chunk_size)
+    print("Correlation Matrix:")
+    print(correlation.matrix)
+
+    predictions = scenario_predictions(df)
+
+    print("\nTime Series Forecasting with ARIMA:")
+    forecast_years, forecast = forecast_arima(df)
+
+    # Pooled renders attach to one shared copy of df; scenarios ship only the columns they plot
+    tasks = [(plot_correlation, (correlation, os.path.join(report_dir, "correlation_matrix_heatmap.png")), {})]
+    tasks += [
+        (plot_scenario, (df, scenario_data, scenario_name,
+                         os.path.join(report_dir, f"{scenario_name}_Temperature_Anomaly.png")), {})
+        for scenario_name, scenario_data in predictions.items()
+    ]
+    tasks += [
+        (plot_forecast, (df, forecast_years, forecast, os.path.join(report_dir, "temperature_anomaly_forecast.png")), {}),
+        (plot_scenario_comparisons, (df, predictions, os.path.join(report_dir, "scenario_comparisons.png")), {})
     ]
-})
-scenario_summary.to_csv("report/scenario_summary.csv", index=False)
-print("Saved: report/scenario_summary.csv")
+    for output_path in run_tasks(tasks, workers, shared=[df]):
+        print(f"Saved: {output_path}")
+
+    # Generate summary table for scenarios
+    summary = scenario_summary(model, df)
+    summary_path = os.path.join(report_dir, "scenario_summary.csv")
+    with span("write scenario_summary.csv", "io", rows=len(summary)):
+        summary.to_csv(summary_path, index=False)
+    print(f"Saved: {summary_path}")
+
+    print(f"\nAdvanced analysis, forecasting, and visualizations saved in the '{report_dir}/' directory.")
+    return summary
+
 
-print("\nAdvanced analysis, forecasting, and visualizations saved in the 'report/' directory.")
+if __name__ == "__main__":
+    main()
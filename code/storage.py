@@ -0,0 +1,205 @@
+import os
+
+import pandas as pd
+
+from instrumentation import span
+from schema import apply_schema, parse_dtypes
+
+# Columnar formats in order of preference when resolving a dataset path.
+# Feather is written uncompressed so that it can be memory-mapped without decoding.
+COLUMNAR_FORMATS = ("feather", "parquet")
+
+
+def has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def default_format():
+    return "feather" if has_pyarrow() else "csv"
+
+
+def dataset_path(path, fmt):
+    """
+    Return ``path`` with its extension replaced by the one for ``fmt``.
+    """
+    return f"{os.path.splitext(path)[0]}.{fmt}"
+
+
+def resolve_dataset_path(path):
+    """
+    Find the file to read for a dataset given by any of its paths.
+
+    A columnar sibling (``.feather`` / ``.parquet``) is preferred as long as it
+    is at least as new as the CSV, so an edited CSV still takes precedence.
+    """
+    csv_path = dataset_path(path, "csv")
+    csv_mtime = os.path.getmtime(csv_path) if os.path.exists(csv_path) else None
+    if has_pyarrow():
+        for fmt in COLUMNAR_FORMATS:
+            candidate = dataset_path(path, fmt)
+            if os.path.exists(candidate) and (csv_mtime is None or os.path.getmtime(candidate) >= csv_mtime):
+                return candidate
+    if csv_mtime is not None:
+        return csv_path
+    if os.path.exists(path):
+        return path
+    raise FileNotFoundError(f"No dataset found for '{path}'")
+
+
+def read_dataset(path, columns=None, memory_map=True, compact=True):
+    """
+    Load a dataset as a DataFrame, optionally projecting to ``columns``.
+
+    Feather files are memory-mapped and converted column by column, so numeric
+    columns without nulls are handed to pandas without an extra copy. With
+    ``compact`` the declared schema types are applied (while parsing for CSV).
+    CSV floats are parsed with round-trip precision, so saved values load back exactly.
+    """
+    source = resolve_dataset_path(path)
+    fmt = os.path.splitext(source)[1].lstrip(".")
+    columns = list(columns) if columns is not None else None
+    with span(f"read {os.path.basename(source)}", "io") as timing:
+        if fmt == "feather":
+            import pyarrow.feather as feather
+            table = feather.read_table(source, columns=columns, memory_map=memory_map)
+            df = table.to_pandas(split_blocks=True)
+        elif fmt == "parquet":
+            import pyarrow.parquet as pq
+            table = pq.read_table(source, columns=columns, memory_map=memory_map)
+            df = table.to_pandas(split_blocks=True)
+        else:
+            df = pd.read_csv(source, usecols=columns, dtype=parse_dtypes(columns) if compact else None,
+                             float_precision="round_trip")
+        timing.set_rows(len(df))
+        return apply_schema(df) if compact else df
+
+
+def write_dataset(df, path, fmt=None, compact=False):
+    """
+    Save a dataset next to ``path`` in the columnar format (CSV without pyarrow).
+
+    Values are written with the precision they have; ``compact`` casts to the
+    schema types first. Returns the path that was written.
+    """
+    fmt = fmt or default_format()
+    target = dataset_path(path, fmt)
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    df = df.reset_index(drop=True)
+    if compact:
+        df = apply_schema(df)
+    with span(f"write {os.path.basename(target)}", "io", rows=len(df)):
+        if fmt == "feather":
+            df.to_feather(target, compression="uncompressed")
+        elif fmt == "parquet":
+            df.to_parquet(target, index=False)
+        else:
+            df.to_csv(target, index=False)
+    return target
+
+
+def iter_dataset_chunks(path, chunk_size, columns=None, compact=True):
+    """
+    Yield a dataset as consecutive DataFrames of at most ``chunk_size`` rows.
+
+    Only one chunk is materialised at a time: CSV is parsed incrementally,
+    feather is memory-mapped and sliced, parquet is read batch by batch. An
+    empty dataset yields one empty chunk, so its columns are still known.
+    """
+    source = resolve_dataset_path(path)
+    fmt = os.path.splitext(source)[1].lstrip(".")
+    columns = list(columns) if columns is not None else None
+    empty = None
+    if fmt == "feather":
+        import pyarrow.feather as feather
+        table = feather.read_table(source, columns=columns, memory_map=True)
+        chunks = (table.slice(offset, chunk_size).to_pandas(split_blocks=True)
+                  for offset in range(0, max(table.num_rows, 1), chunk_size))
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(source)
+        chunks = (batch.to_pandas(split_blocks=True)
+                  for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns))
+        schema = parquet_file.schema_arrow
+        empty = schema.empty_table().select(columns or schema.names).to_pandas()
+    else:
+        dtype = parse_dtypes(columns) if compact else None
+        chunks = pd.read_csv(source, usecols=columns, dtype=dtype, float_precision="round_trip", chunksize=chunk_size)
+        empty = pd.read_csv(source, usecols=columns, dtype=dtype, nrows=0)
+    for chunk in chunks:
+        empty = None
+        yield apply_schema(chunk) if compact else chunk
+    if empty is not None:
+        yield apply_schema(empty) if compact else empty
+
+
+class DatasetWriter:
+    """
+    Write a dataset chunk by chunk; the file appears under its final name on ``close``.
+
+    Every chunk must have the columns of the first one. If no chunk is written,
+    ``empty`` (a DataFrame with the dataset's columns and types but no rows) is
+    written instead, so the file always exists. Usable as a context manager.
+    """
+
+    def __init__(self, path, fmt=None, compact=False, empty=None):
+        self.fmt = fmt or default_format()
+        self.path = dataset_path(path, self.fmt)
+        self.compact = compact
+        self.empty = empty if empty is not None else pd.DataFrame()
+        self.rows = 0
+        self._temp_path = self.path + ".tmp"
+        self._writer = None
+        self._schema = None
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+    def write(self, df):
+        df = df.reset_index(drop=True)
+        if self.compact:
+            df = apply_schema(df)
+        with span(f"write {os.path.basename(self.path)}", "io", rows=len(df)):
+            if self.fmt == "csv":
+                df.to_csv(self._temp_path, index=False, mode="w" if self._schema is None else "a",
+                          header=self._schema is None)
+                self._schema = list(df.columns)
+            else:
+                import pyarrow as pa
+                table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+                if self._writer is None:
+                    self._schema = table.schema
+                    self._writer = self._open(table.schema)
+                self._writer.write_table(table)
+        self.rows += len(df)
+
+    def _open(self, schema):
+        if self.fmt == "feather":
+            import pyarrow as pa
+            return pa.ipc.new_file(self._temp_path, schema)
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(self._temp_path, schema)
+
+    def close(self):
+        if self._schema is None:
+            self.write(self.empty.iloc[:0])
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if os.path.exists(self._temp_path):
+            os.replace(self._temp_path, self.path)
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            if self._writer is not None:
+                self._writer.close()
+            if os.path.exists(self._temp_path):
+                os.remove(self._temp_path)
+        return False
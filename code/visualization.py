@@ -1,37 +1,75 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-import plotly.express as px
 import plotly.graph_objects as go
 import os
 
-# Load the cleaned dataset
-df = pd.read_csv("fully_cleaned_global_warming_sim_dataset.csv")
+from aggregate_cube import load_or_build_cube
+from correlation import CHUNK_SIZE, load_or_compute_correlation, render_correlation_heatmap
+from decomposition import write_decomposition
+from downsampling import downsample_frame, render_mode
+from html_export import write_compact_html
+from instrumentation import span, traced
+from parallel import run_tasks
+from rolling_features import feature_name, rolling_features
+from storage import read_dataset
 
-# Create report directory if it doesn't exist
-os.makedirs("report", exist_ok=True)
+CLEANED_DATASET = "fully_cleaned_global_warming_sim_dataset.csv"
+REPORT_DIR = "report"
+
+# "compact" HTML files share one local plotly.js and embed data as typed arrays;
+# "standalone" files embed the full plotly.js bundle in every file
+HTML_OUTPUT_MODE = os.environ.get("GWF_HTML_MODE", "compact")
+
+
+def save_html(fig, output_path, mode=None):
+    if (mode or HTML_OUTPUT_MODE) == "compact":
+        write_compact_html(fig, output_path)
+    else:
+        fig.write_html(output_path)
+
+
+def color_marker(values, title):
+    """
+    Marker settings that colour a single trace by ``values``.
+
+    Replaces one-trace-per-category colouring; non-numeric values are mapped to
+    category codes and labelled on the colour bar.
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        return dict(color=values.to_numpy(), colorscale="Viridis", showscale=True, colorbar=dict(title=title))
+    categories = pd.Categorical(values)
+    return dict(
+        color=categories.codes, colorscale="Viridis", showscale=True,
+        colorbar=dict(title=title, tickvals=list(range(len(categories.categories))), ticktext=list(map(str, categories.categories)))
+    )
 
 # 1. Advanced Correlation Heatmap with Clustering
+@traced(category="render")
 def advanced_correlation_heatmap(data, output_path="report/advanced_correlation_heatmap.png"):
-    plt.figure(figsize=(12, 10))
-    corr = data.corr()
-    sns.clustermap(corr, annot=True, fmt=".2f", cmap="coolwarm", figsize=(12, 10), cbar_kws={'label': 'Correlation'})
-    plt.title("Advanced Correlation Heatmap with Clustering", pad=20)
-    plt.savefig(output_path)
-    plt.close()
+    # Matrix and linkage are computed once per dataset version and reused from .cache
+    result = load_or_compute_correlation(data)
+    render_correlation_heatmap(result, output_path, "Advanced Correlation Heatmap with Clustering", clustered=True)
     print(f"Saved: {output_path}")
 
 # 2. Interactive 3D Scatter Plot
+@traced(category="render")
 def interactive_3d_scatter(data, x, y, z, color, output_path="report/interactive_3d_scatter.html"):
-    fig = px.scatter_3d(
-        data, x=x, y=y, z=z, color=color, 
+    fig = go.Figure(go.Scatter3d(
+        x=data[x], y=data[y], z=data[z], mode="markers",
+        marker=dict(size=4, **color_marker(data[color], color))
+    ))
+    fig.update_layout(
         title="3D Scatter Plot of Greenhouse Gases vs Temperature Anomaly",
-        template="plotly_dark"
+        template="plotly_dark",
+        scene=dict(xaxis_title=x, yaxis_title=y, zaxis_title=z)
     )
-    fig.write_html(output_path)
+    save_html(fig, output_path)
     print(f"Saved: {output_path}")
 
 # 3. Time Series Decomposition
+@traced(category="render")
 def time_series_decomposition(data, column, output_path="report/time_series_decomposition.png"):
     from statsmodels.tsa.seasonal import seasonal_decompose
     result = seasonal_decompose(data[column], model="additive", period=12)
@@ -40,12 +78,28 @@ def time_series_decomposition(data, column, output_path="report/time_series_deco
     plt.close()
     print(f"Saved: {output_path}")
 
+# 3b. Batched Decomposition of Every Variable (and Region, when present)
+@traced(category="render")
+def batched_time_series_decomposition(data, columns=None, group_col=None, output_dir="report/decomposition",
+                                      components_path="report/decomposition_components.csv"):
+    if group_col is None and "Region" in data.columns:
+        group_col = "Region"
+    if columns is None:
+        columns = [col for col in data.select_dtypes("number").columns if col not in ("Year", "Month", group_col)]
+    return write_decomposition(data, columns, output_dir=output_dir, components_path=components_path, group_col=group_col)
+
 # 4. Line Chart with Rolling Averages
+@traced(category="render")
 def line_chart_with_rolling_averages(data, column, window=12, output_path="report/rolling_average_chart.png"):
-    plt.figure(figsize=(12, 6))
-    data[f"{column}_Rolling_Avg"] = data[column].rolling(window=window).mean()
-    plt.plot(data["Year"], data[column], label=f"Actual {column}", linestyle="--", color="blue")
-    plt.plot(data["Year"], data[f"{column}_Rolling_Avg"], label=f"{window}-Month Rolling Average", color="red")
+    fig = plt.figure(figsize=(12, 6))
+    # Rolling features are computed into a separate frame; the caller's data is left untouched
+    rolling_col = feature_name(column, "mean", window)
+    features = rolling_features(data, [column], windows=(window,), stats=("mean",))
+    chart_data = pd.concat([data[["Year", column]], features], axis=1)
+    # Only draw as many points as the figure has horizontal pixels for
+    points = downsample_frame(chart_data, "Year", [column, rolling_col], width=fig.get_figwidth() * fig.dpi)
+    plt.plot(points["Year"], points[column], label=f"Actual {column}", linestyle="--", color="blue")
+    plt.plot(points["Year"], points[rolling_col], label=f"{window}-Month Rolling Average", color="red")
     plt.title(f"{column} with {window}-Month Rolling Average")
     plt.xlabel("Year")
     plt.ylabel(column)
@@ -56,8 +110,11 @@ def line_chart_with_rolling_averages(data, column, window=12, output_path="repor
     print(f"Saved: {output_path}")
 
 # 5. Heatmap of Annual Temperature Anomalies
-def annual_temperature_heatmap(data, year_col="Year", temp_col="Temperature_Anomaly_C", output_path="report/annual_temperature_heatmap.png"):
-    pivot = data.pivot_table(values=temp_col, index=year_col, aggfunc="mean")
+@traced(category="render")
+def annual_temperature_heatmap(data, year_col="Year", temp_col="Temperature_Anomaly_C", output_path="report/annual_temperature_heatmap.png", cube=None):
+    # Annual means come from the materialized aggregate cube instead of a pivot over raw rows
+    cube = cube or load_or_build_cube(data)
+    pivot = cube.annual_means([temp_col]).rename_axis(year_col)
     plt.figure(figsize=(10, 6))
     sns.heatmap(pivot, annot=True, fmt=".2f", cmap="coolwarm", cbar_kws={"label": "Temperature Anomaly (°C)"})
     plt.title("Annual Temperature Anomaly Heatmap")
@@ -68,19 +125,60 @@ def annual_temperature_heatmap(data, year_col="Year", temp_col="Temperature_Anom
     print(f"Saved: {output_path}")
 
 # 6. Interactive Line Chart with Plotly
+@traced(category="render")
 def interactive_line_chart(data, x, y, color, output_path="report/interactive_line_chart.html"):
-    fig = px.line(data, x=x, y=y, color=color, title="Interactive Line Chart of Temperature Anomalies", template="plotly_white")
-    fig.write_html(output_path)
+    points = downsample_frame(data, x, y)
+    trace_type = go.Scattergl if render_mode(len(data)) == "webgl" else go.Scatter
+    fig = go.Figure(trace_type(
+        x=points[x], y=points[y], mode="lines+markers", name=y,
+        line=dict(color="lightgray", width=1),
+        marker=dict(size=5, **color_marker(points[color], color))
+    ))
+    fig.update_layout(
+        title="Interactive Line Chart of Temperature Anomalies",
+        template="plotly_white",
+        xaxis_title=x,
+        yaxis_title=y
+    )
+    save_html(fig, output_path)
     print(f"Saved: {output_path}")
 
-# Call functions to generate advanced visualizations
-advanced_correlation_heatmap(df)
-interactive_3d_scatter(
-    df, x="CO2_Concentration_ppm", y="CH4_Concentration_ppb", z="Temperature_Anomaly_C", color="Year"
-)
-time_series_decomposition(df, column="Temperature_Anomaly_C")
-line_chart_with_rolling_averages(df, column="Temperature_Anomaly_C")
-annual_temperature_heatmap(df)
-interactive_line_chart(df, x="Year", y="Temperature_Anomaly_C", color="Year")
-
-print("All advanced visualizations generated and saved in the 'report/' directory.")
+def main(input_path=CLEANED_DATASET, report_dir=REPORT_DIR, workers=1, chunk_size=CHUNK_SIZE):
+    """
+    Generate every advanced visualization into ``report_dir``.
+
+    With ``workers > 1`` the charts are rendered in a process pool that shares
+    the dataset through shared memory.
+    """
+    # Create report directory if it doesn't exist
+    os.makedirs(report_dir, exist_ok=True)
+    df = read_dataset(input_path)
+
+    with span("aggregate_cube", rows=len(df)):
+        cube = load_or_build_cube(df)
+    # Warm the correlation cache so a pooled render only has to load it
+    load_or_compute_correlation(df, chunk_size=chunk_size)
+
+    def output(name):
+        return os.path.join(report_dir, name)
+
+    tasks = [
+        (advanced_correlation_heatmap, (df, output("advanced_correlation_heatmap.png")), {}),
+        (interactive_3d_scatter, (df,), dict(
+            x="CO2_Concentration_ppm", y="CH4_Concentration_ppb", z="Temperature_Anomaly_C", color="Year",
+            output_path=output("interactive_3d_scatter.html"))),
+        (time_series_decomposition, (df,), dict(column="Temperature_Anomaly_C", output_path=output("time_series_decomposition.png"))),
+        (batched_time_series_decomposition, (df,), dict(
+            output_dir=output("decomposition"), components_path=output("decomposition_components.csv"))),
+        (line_chart_with_rolling_averages, (df,), dict(column="Temperature_Anomaly_C", output_path=output("rolling_average_chart.png"))),
+        (annual_temperature_heatmap, (df,), dict(cube=cube, output_path=output("annual_temperature_heatmap.png"))),
+        (interactive_line_chart, (df,), dict(x="Year", y="Temperature_Anomaly_C", color="Year",
+                                             output_path=output("interactive_line_chart.html")))
+    ]
+    run_tasks(tasks, workers, shared=[df])
+
+    print(f"All advanced visualizations generated and saved in the '{report_dir}/' directory.")
+
+
+if __name__ == "__main__":
+    main()
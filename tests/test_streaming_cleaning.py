@@ -0,0 +1,55 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "code"))
+
+from data_generation import generate_dataset  # noqa: E402
+from data_preprocessing import clean_dataset, clean_dataset_streaming  # noqa: E402
+from storage import read_dataset, write_dataset  # noqa: E402
+
+FORMATS = ["feather", "parquet", "csv"]
+CHUNK_SIZE = 700
+
+
+def raw_dataset():
+    """
+    Ten runs of generate_dataset (3000 rows) with scattered and leading/trailing gaps.
+    """
+    df = pd.concat([generate_dataset(seed=seed) for seed in range(10)], ignore_index=True)
+    rng = np.random.default_rng(1)
+    for col in ["CO2_Concentration_ppm", "Natural_Disasters_Count", "Month"]:
+        values = df[col].astype("float64").to_numpy()
+        values[rng.random(len(df)) < 0.05] = np.nan
+        df[col] = values
+    # A leading gap longer than a chunk
+    df.loc[:999, "CH4_Concentration_ppb"] = np.nan
+    df.loc[len(df) - 5:, "N2O_Concentration_ppb"] = np.nan
+    return df
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_streaming_matches_in_memory(tmp_path, fmt):
+    source = write_dataset(raw_dataset(), str(tmp_path / "raw"), fmt)
+    expected = clean_dataset(read_dataset(source, compact=False)).reset_index(drop=True)
+
+    output = clean_dataset_streaming(source, str(tmp_path / "clean"), fmt, chunk_size=CHUNK_SIZE)
+
+    # CSV does not record types, so integer columns read back as they were parsed
+    pd.testing.assert_frame_equal(read_dataset(output, compact=False), expected,
+                                  check_exact=True, check_dtype=fmt != "csv")
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_streaming_empty_input(tmp_path, fmt):
+    source = write_dataset(raw_dataset().iloc[:0], str(tmp_path / "raw"), fmt)
+
+    output = clean_dataset_streaming(source, str(tmp_path / "clean"), fmt, chunk_size=CHUNK_SIZE)
+
+    assert os.path.exists(output)
+    result = read_dataset(output, compact=False)
+    assert len(result) == 0
+    assert list(result.columns) == list(read_dataset(source, compact=False).columns)